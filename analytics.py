@@ -0,0 +1,131 @@
+# analytics.py
+from psycopg2.extras import RealDictCursor
+from typing import Dict, List, TYPE_CHECKING
+from profiling import profile_phase
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _date_filters(start_date=None, end_date=None, column: str = 'created_at') -> tuple:
+    conditions = []
+    params = []
+    if start_date:
+        conditions.append(f"{column} >= %s")
+        params.append(start_date)
+    if end_date:
+        conditions.append(f"{column} < %s::date + INTERVAL '1 day'")
+        params.append(end_date)
+    return conditions, params
+
+
+def _where(conditions: List[str]) -> str:
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def _query_frame(db, query: str, params: List, columns: List[str]) -> 'pd.DataFrame':
+    """Run an aggregate query and return its (small) result as a DataFrame"""
+    import pandas as pd
+    
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+    with profile_phase('dataframe'):
+        return pd.DataFrame(rows, columns=columns)
+
+
+def get_order_kpis(db, start_date=None, end_date=None) -> Dict:
+    """Headline order metrics, read from the daily order rollup"""
+    conditions, params = _date_filters(start_date, end_date, column='sales_date')
+    with db.connection() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute(f"""
+            SELECT
+                COALESCE(SUM(order_count), 0) AS total_orders,
+                COALESCE(SUM(revenue), 0)::float8 AS total_amount,
+                COALESCE(SUM(order_count) FILTER (WHERE status = 'delivered'), 0) AS delivered_orders,
+                COALESCE(SUM(revenue) FILTER (WHERE status = 'delivered'), 0)::float8 AS total_revenue,
+                COALESCE(SUM(order_count) FILTER (WHERE status IN ('placed', 'paid')), 0) AS pending_orders
+            FROM daily_order_rollup
+            {_where(conditions)}
+        """, params)
+        kpis = dict(cursor.fetchone())
+
+    total_amount = kpis.pop('total_amount')
+    kpis['avg_order_value'] = total_amount / kpis['total_orders'] if kpis['total_orders'] else 0
+    kpis['completion_rate'] = (
+        kpis['delivered_orders'] / kpis['total_orders'] * 100 if kpis['total_orders'] else 0
+    )
+    return kpis
+
+
+def get_status_counts(db, start_date=None, end_date=None) -> 'pd.DataFrame':
+    """Order count per status, read from the daily order rollup"""
+    conditions, params = _date_filters(start_date, end_date, column='sales_date')
+    return _query_frame(db, f"""
+        SELECT status, SUM(order_count)
+        FROM daily_order_rollup
+        {_where(conditions)}
+        GROUP BY status
+        HAVING SUM(order_count) > 0
+        ORDER BY SUM(order_count) DESC
+    """, params, ['status', 'count'])
+
+
+def get_top_customers(db, limit: int = 10, start_date=None, end_date=None) -> 'pd.DataFrame':
+    """Customers with the most orders, with their order total"""
+    conditions, params = _date_filters(start_date, end_date)
+    return _query_frame(db, f"""
+        SELECT username, COUNT(*), COALESCE(SUM(total_amount), 0)::float8
+        FROM orders
+        {_where(conditions)}
+        GROUP BY username
+        ORDER BY COUNT(*) DESC, username
+        LIMIT %s
+    """, params + [limit], ['username', 'order_count', 'total_amount'])
+
+
+def get_daily_sales(db, statuses: List[str] = None, start_date=None, end_date=None) -> 'pd.DataFrame':
+    """Order count and revenue per day, read from the daily order rollup"""
+    conditions, params = _date_filters(start_date, end_date, column='sales_date')
+    if statuses:
+        conditions.append("status = ANY(%s)")
+        params.append(list(statuses))
+    return _query_frame(db, f"""
+        SELECT sales_date, SUM(order_count), COALESCE(SUM(revenue), 0)::float8
+        FROM daily_order_rollup
+        {_where(conditions)}
+        GROUP BY sales_date
+        HAVING SUM(order_count) > 0
+        ORDER BY sales_date
+    """, params, ['Date', 'Order Count', 'Revenue'])
+
+
+def get_top_selling_products(db, by: str = 'units', limit: int = 10, start_date=None, end_date=None,
+                             category: str = None, statuses: List[str] = None) -> 'pd.DataFrame':
+    """Top-N products by units sold or revenue, read from the daily product rollup.
+
+    Cancelled orders are excluded unless statuses says otherwise.
+    """
+    if by not in ('units', 'revenue'):
+        raise ValueError(f"Unknown top sellers ranking: {by}")
+
+    conditions, params = _date_filters(start_date, end_date, column='r.sales_date')
+    conditions.append("r.status = ANY(%s)")
+    params.append(list(statuses or ['placed', 'paid', 'delivered']))
+    if category:
+        conditions.append("r.category = %s")
+        params.append(category)
+
+    order_column = 'SUM(r.units)' if by == 'units' else 'SUM(r.revenue)'
+    return _query_frame(db, f"""
+        SELECT r.product_id, p.name, p.category, SUM(r.units), COALESCE(SUM(r.revenue), 0)::float8
+        FROM daily_product_rollup r
+        JOIN products p ON p.id = r.product_id
+        {_where(conditions)}
+        GROUP BY r.product_id, p.name, p.category
+        HAVING SUM(r.units) > 0
+        ORDER BY {order_column} DESC, p.name
+        LIMIT %s
+    """, params + [limit], ['product_id', 'name', 'category', 'units', 'revenue'])
@@ -1,7 +1,13 @@
 import streamlit as st
 from auth import AuthManager
+from password_hashing import HasherBusy
 from database import DatabaseManager
-import pandas as pd
+from utils import show_pagination_controls, show_top_selling_products, show_render_profile_panel, show_bulk_status_action
+from reservation_sweeper import start_sweeper_from_env
+import analytics
+from functools import partial
+from async_database import AsyncDatabaseManager
+from profiling import profile_rerun, profile_phase, render_profiling_enabled, set_profile_page
 
 # Initialize session state
 if 'authenticated' not in st.session_state:
@@ -14,8 +20,9 @@ if 'username' not in st.session_state:
 # Initialize database and auth
 @st.cache_resource
 def init_managers():
-    db = DatabaseManager()
+    db = DatabaseManager.shared()
     auth = AuthManager(db)
+    start_sweeper_from_env(db)
     return db, auth
 
 db, auth = init_managers()
@@ -28,10 +35,22 @@ def main():
         initial_sidebar_state="expanded"
     )
     
-    if not st.session_state.authenticated:
-        show_login_page()
-    else:
-        show_authenticated_app()
+    # Opt-in per-rerun timing: RENDER_PROFILING=1 for everyone, or an admin's session toggle
+    profiling = render_profiling_enabled() or st.session_state.get('render_profiling', False)
+    sample = None
+    with profile_rerun(profiling, role=st.session_state.user_role) as profile:
+        if not st.session_state.authenticated:
+            set_profile_page("Login")
+            show_login_page()
+        else:
+            show_authenticated_app()
+    
+    if profile is not None:
+        sample = profile.finish()
+        db.record_render_profile(sample)
+    
+    if st.session_state.user_role == 'admin':
+        show_render_profile_panel(db, sample)
 
 def show_login_page():
     st.title("🏪 OmniTrack")
@@ -48,15 +67,19 @@ def show_login_page():
             password = st.text_input("Password", type="password", key="login_password")
             
             if st.button("Login", type="primary"):
-                user = auth.authenticate_user(username, password)
-                if user:
-                    st.session_state.authenticated = True
-                    st.session_state.user_role = user['role']
-                    st.session_state.username = username
-                    st.success("Login successful!")
-                    st.rerun()
+                try:
+                    user = auth.authenticate_user(username, password)
+                except HasherBusy as e:
+                    st.warning(str(e))
                 else:
-                    st.error("Invalid username or password")
+                    if user:
+                        st.session_state.authenticated = True
+                        st.session_state.user_role = user['role']
+                        st.session_state.username = username
+                        st.success("Login successful!")
+                        st.rerun()
+                    else:
+                        st.error("Invalid username or password")
         
         with tab2:
             st.header("Sign Up")
@@ -70,10 +93,13 @@ def show_login_page():
                 elif len(new_password) < 6:
                     st.error("Password must be at least 6 characters long")
                 else:
-                    if auth.register_user(new_username, new_password, 'customer'):
-                        st.success("Account created successfully! Please login.")
-                    else:
-                        st.error("Username already exists")
+                    try:
+                        if auth.register_user(new_username, new_password, 'customer'):
+                            st.success("Account created successfully! Please login.")
+                        else:
+                            st.error("Username already exists")
+                    except HasherBusy as e:
+                        st.warning(str(e))
         
         with tab3:
             st.header("Demo Access")
@@ -134,6 +160,7 @@ def show_admin_navigation():
     }
     
     selected_page = st.sidebar.radio("Navigation", list(pages.keys()))
+    set_profile_page(selected_page)
     
     if selected_page == "Dashboard":
         show_admin_dashboard()
@@ -154,6 +181,7 @@ def show_staff_navigation():
     }
     
     selected_page = st.sidebar.radio("Navigation", list(pages.keys()))
+    set_profile_page(selected_page)
     
     if selected_page == "Dashboard":
         show_staff_dashboard()
@@ -172,6 +200,7 @@ def show_customer_navigation():
     }
     
     selected_page = st.sidebar.radio("Navigation", list(pages.keys()))
+    set_profile_page(selected_page)
     
     if selected_page == "Shop":
         show_shop()
@@ -196,38 +225,38 @@ def show_admin_order_management():
 def show_reports():
     st.title("📊 Reports & Analytics")
     
-    # Order Statistics
-    orders = db.get_all_orders()
-    products = db.get_all_products()
+    # Order Statistics (aggregated in Postgres, fetched concurrently)
+    data = AsyncDatabaseManager.for_manager(db).fetch_all(
+        kpis=partial(analytics.get_order_kpis, db),
+        products=db.get_all_products,
+        daily_revenue=partial(analytics.get_daily_sales, db, statuses=['delivered'])
+    )
+    kpis = data['kpis']
+    products = data['products']
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Orders", len(orders))
+        st.metric("Total Orders", kpis['total_orders'])
     with col2:
-        total_revenue = sum(order['total_amount'] for order in orders if order['status'] == 'delivered')
-        st.metric("Total Revenue", f"${total_revenue:.2f}")
+        st.metric("Total Revenue", f"${kpis['total_revenue']:.2f}")
     with col3:
-        pending_orders = [o for o in orders if o['status'] in ['placed', 'paid']]
-        st.metric("Pending Orders", len(pending_orders))
+        st.metric("Pending Orders", kpis['pending_orders'])
     with col4:
         low_stock = [p for p in products if p['stock_quantity'] < 10]
         st.metric("Low Stock Items", len(low_stock))
     
     # Revenue Chart
-    if orders:
+    if kpis['delivered_orders']:
         import plotly.express as px
         
-        df_orders = pd.DataFrame(orders)
-        df_orders['created_at'] = pd.to_datetime(df_orders['created_at'])
-        df_orders = df_orders[df_orders['status'] == 'delivered']
+        daily_revenue = data['daily_revenue']
         
-        if not df_orders.empty:
-            daily_revenue = df_orders.groupby(df_orders['created_at'].dt.date)['total_amount'].sum().reset_index()
-            daily_revenue.columns = ['Date', 'Revenue']
-            
+        with profile_phase('charts'):
             fig = px.line(daily_revenue, x='Date', y='Revenue', title='Daily Revenue')
             st.plotly_chart(fig, use_container_width=True)
+    
+    show_top_selling_products(db, key="reports_top_sellers")
 
 # Staff Dashboard Functions
 def show_staff_dashboard():
@@ -237,19 +266,29 @@ def show_staff_dashboard():
 def show_order_fulfillment():
     st.title("📋 Order Fulfillment")
     
-    orders = [o for o in db.get_all_orders() if o['status'] in ['placed', 'paid']]
+    total_pending = db.count_orders(statuses=['placed', 'paid'])
     
-    if not orders:
+    if not total_pending:
         st.info("No pending orders to fulfill.")
         return
     
+    limit, offset = show_pagination_controls(total_pending, key="fulfillment")
+    orders = db.query_orders(statuses=['placed', 'paid'], limit=limit, offset=offset, include_items=True)
+    
+    # Bulk transitions for the orders on this page (one update, one rerun)
+    with st.expander("Bulk update orders on this page"):
+        col1, col2 = st.columns(2)
+        with col1:
+            show_bulk_status_action(db, orders, 'placed', 'paid', "Mark as Paid", key="fulfillment_bulk_pay")
+        with col2:
+            show_bulk_status_action(db, orders, 'paid', 'delivered', "Mark as Delivered", key="fulfillment_bulk_deliver")
+    
     for order in orders:
         with st.expander(f"Order #{order['id']} - {order['username']} - ${order['total_amount']:.2f}"):
             st.write(f"**Status:** {order['status'].title()}")
             st.write(f"**Created:** {order['created_at']}")
             
-            # Get order items
-            items = db.get_order_items(order['id'])
+            items = order['items']
             if items:
                 st.write("**Items:**")
                 for item in items:
@@ -277,10 +316,13 @@ def show_inventory_check():
     products = db.get_all_products()
     
     if products:
-        df = pd.DataFrame(products)
+        import pandas as pd
         
-        # Low stock alert
-        low_stock = df[df['stock_quantity'] < 10]
+        with profile_phase('dataframe'):
+            df = pd.DataFrame(products)
+            
+            # Low stock alert
+            low_stock = df[df['stock_quantity'] < 10]
         if not low_stock.empty:
             st.warning("⚠️ Low Stock Alert!")
             st.dataframe(low_stock[['name', 'stock_quantity', 'price']], use_container_width=True)
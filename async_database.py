@@ -0,0 +1,74 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+from profiling import profile_phase
+
+
+class AsyncDatabaseManager:
+    """asyncio facade over a DatabaseManager.
+
+    Every DatabaseManager method is available as a coroutine (e.g.
+    `await adb.get_all_products()`) that runs on a worker thread with its own
+    pooled connection, so independent queries awaited together overlap and
+    page latency becomes the slowest query rather than the sum of all.
+    The worker count matches the connection pool size to avoid pool waits.
+    """
+
+    _instances_lock = threading.Lock()
+
+    def __init__(self, db, max_workers: int = None):
+        self.db = db
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or db.pool.max_size,
+            thread_name_prefix='db-async'
+        )
+
+    @classmethod
+    def for_manager(cls, db) -> 'AsyncDatabaseManager':
+        """Shared async facade for a DatabaseManager (one executor per manager)"""
+        with cls._instances_lock:
+            manager = db.__dict__.get('_async_manager')
+            if manager is None:
+                manager = cls(db)
+                db._async_manager = manager
+            return manager
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run any blocking callable (e.g. an analytics query) on the worker threads"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name):
+        attr = getattr(self.db, name)
+        if not callable(attr):
+            return attr
+
+        async def method(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        method.__name__ = name
+        return method
+
+    async def gather(self, **calls: Callable) -> Dict[str, Any]:
+        """Run zero-argument blocking callables concurrently, keyed by name"""
+        names = list(calls.keys())
+        results = await asyncio.gather(*(self.run(calls[name]) for name in names))
+        return dict(zip(names, results))
+
+    def fetch_all(self, **calls: Callable) -> Dict[str, Any]:
+        """Synchronous entry point for Streamlit pages.
+
+        Example:
+            data = AsyncDatabaseManager.for_manager(db).fetch_all(
+                products=db.get_all_products,
+                recent_orders=functools.partial(db.get_orders_with_items, limit=15)
+            )
+        """
+        # Worker threads don't see the rerun profile, so the whole wait is one 'db' span
+        with profile_phase('db'):
+            return asyncio.run(self.gather(**calls))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
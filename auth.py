@@ -1,31 +1,29 @@
-import bcrypt
 import os
 from typing import Optional, Dict
 from database import DatabaseManager
+from password_hashing import PasswordHasher, HasherBusy
 
 class AuthManager:
-    def __init__(self, db: DatabaseManager):
+    def __init__(self, db: DatabaseManager, hasher: PasswordHasher = None):
         self.db = db
         self.session_secret = os.getenv('SESSION_SECRET', 'default_secret_key')
+        # bcrypt runs on a bounded worker pool; BCRYPT_ROUNDS sets the work factor
+        self.hasher = hasher or PasswordHasher.from_env()
     
     def hash_password(self, password: str) -> str:
-        """Hash a password using bcrypt"""
-        salt = bcrypt.gensalt()
-        return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+        """Hash a password using bcrypt (raises HasherBusy when overloaded)"""
+        return self.hasher.hash(password)
     
     def verify_password(self, password: str, hashed: str) -> bool:
-        """Verify a password against its hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+        """Verify a password against its hash (raises HasherBusy when overloaded)"""
+        return self.hasher.verify(password, hashed)
     
     def register_user(self, username: str, password: str, role: str = 'customer') -> bool:
-        """Register a new user"""
+        """Register a new user; False if the username is taken"""
         if not username or not password:
             return False
         
-        # Check if username already exists
-        if self.db.get_user(username):
-            return False
-        
+        # Uniqueness is enforced by the insert itself (ON CONFLICT), no lookup first
         hashed_password = self.hash_password(password)
         return self.db.create_user(username, hashed_password, role)
     
@@ -51,6 +49,7 @@ class AuthManager:
             return None
         
         if self.verify_password(password, user['password_hash']):
+            self._rehash_if_needed(username, password, user['password_hash'])
             return {
                 'id': user['id'],
                 'username': user['username'],
@@ -60,6 +59,16 @@ class AuthManager:
         
         return None
     
+    def _rehash_if_needed(self, username: str, password: str, current_hash: str):
+        """Upgrade a hash made with another work factor while the plaintext is at hand"""
+        if not self.hasher.needs_rehash(current_hash):
+            return
+        try:
+            new_hash = self.hash_password(password)
+        except HasherBusy:
+            return  # try again on a later login
+        self.db.update_password_hash(username, current_hash, new_hash)
+    
     def create_admin_user(self, username: str, password: str) -> bool:
         """Create an admin user"""
         return self.register_user(username, password, 'admin')
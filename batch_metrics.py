@@ -0,0 +1,151 @@
+# batch_metrics.py
+"""Columnar equivalents of the metric helpers in utils.
+
+Each function takes a DataFrame (or a dict of NumPy arrays with the same
+column names) instead of a list of row dicts and returns the same values as
+its utils counterpart, computed with vectorized operations. Amounts come
+back as floats where the row versions sum Decimals.
+
+Build the frame once with orders_frame()/products_frame() and reuse it: they
+convert Decimal amounts to float, statuses to a categorical and created_at to
+timestamps, which is most of the per-row cost the helpers would otherwise pay
+on every call.
+"""
+from datetime import datetime
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+ORDER_STATUSES = ('placed', 'paid', 'delivered', 'cancelled')
+
+# Columns of the orders / products tables, so frames built from no rows still have them
+ORDER_COLUMNS = ('id', 'username', 'status', 'total_amount', 'created_at', 'updated_at')
+PRODUCT_COLUMNS = ('id', 'name', 'description', 'price', 'stock_quantity', 'category', 'sku', 'created_at', 'updated_at')
+
+
+def orders_frame(orders) -> pd.DataFrame:
+    """Typed DataFrame of order rows (as returned by DatabaseManager) for the helpers below"""
+    frame = pd.DataFrame(_frame(orders, ORDER_COLUMNS))
+    frame['status'] = pd.Categorical(frame['status'], categories=ORDER_STATUSES)
+    frame['total_amount'] = _column(frame, 'total_amount', np.float64)
+    frame['created_at'] = _to_timestamps(frame['created_at'])
+    return frame
+
+
+def products_frame(products) -> pd.DataFrame:
+    """Typed DataFrame of product rows for check_low_stock/calculate_inventory_value"""
+    frame = pd.DataFrame(_frame(products, PRODUCT_COLUMNS))
+    frame['price'] = _column(frame, 'price', np.float64)
+    return frame
+
+
+def _is_empty(data) -> bool:
+    """No rows, for a DataFrame, a dict of columns (possibly with no columns) or a list of rows"""
+    if isinstance(data, dict):
+        return all(len(column) == 0 for column in data.values())
+    return len(data) == 0
+
+
+def _frame(data, columns) -> pd.DataFrame:
+    """data as a DataFrame; without rows, an empty one that still has the table's columns"""
+    if isinstance(data, pd.DataFrame):
+        return data
+    if _is_empty(data):
+        return pd.DataFrame(columns=list(columns))
+    return pd.DataFrame(data)
+
+
+def _column(frame, name: str, dtype=None) -> np.ndarray:
+    return np.asarray(frame[name], dtype=dtype)
+
+
+def _series(frame, name: str) -> pd.Series:
+    column = frame[name]
+    return column if isinstance(column, pd.Series) else pd.Series(column)
+
+
+def calculate_order_metrics(orders) -> Dict:
+    """Vectorized utils.calculate_order_metrics"""
+    if _is_empty(orders):
+        return {
+            'total_orders': 0,
+            'total_revenue': 0,
+            'avg_order_value': 0,
+            'completion_rate': 0
+        }
+
+    status = _series(orders, 'status')
+    total_orders = len(status)
+    delivered = (status == 'delivered').to_numpy(dtype=bool)
+    delivered_count = int(np.count_nonzero(delivered))
+    total_revenue = float(_column(orders, 'total_amount', np.float64)[delivered].sum())
+
+    return {
+        'total_orders': total_orders,
+        'total_revenue': total_revenue,
+        'avg_order_value': total_revenue / delivered_count if delivered_count else 0,
+        'completion_rate': delivered_count / total_orders * 100
+    }
+
+
+def get_order_status_counts(orders) -> Dict[str, int]:
+    """Vectorized utils.get_order_status_counts (unknown statuses are ignored)"""
+    if _is_empty(orders):
+        return {status: 0 for status in ORDER_STATUSES}
+    counts = _series(orders, 'status').value_counts()
+    return {status: int(counts.get(status, 0)) for status in ORDER_STATUSES}
+
+
+def check_low_stock(products, threshold=10) -> pd.DataFrame:
+    """Vectorized utils.check_low_stock; returns the matching rows as a DataFrame"""
+    frame = _frame(products, PRODUCT_COLUMNS)
+    if _is_empty(frame):
+        return frame
+    return frame[_column(frame, 'stock_quantity') < threshold]
+
+
+def calculate_inventory_value(products) -> float:
+    """Vectorized utils.calculate_inventory_value"""
+    if _is_empty(products):
+        return 0
+    stock = _column(products, 'stock_quantity', np.float64)
+    price = _column(products, 'price', np.float64)
+    return float(np.dot(stock, price))
+
+
+def filter_orders_by_date_range(orders, start_date, end_date) -> pd.DataFrame:
+    """Vectorized utils.filter_orders_by_date_range.
+
+    created_at is parsed once per column instead of per row; unparseable
+    values are dropped like in the row version. A column that already holds
+    datetimes is used as is (the row version only accepts ISO strings).
+    """
+    frame = _frame(orders, ORDER_COLUMNS)
+    if _is_empty(frame):
+        return frame
+    order_date = _to_timestamps(frame['created_at']).dt.normalize()
+    mask = (order_date >= pd.Timestamp(start_date)) & (order_date <= pd.Timestamp(end_date))
+    return frame[mask.to_numpy()]
+
+
+def _to_timestamps(created_at: pd.Series) -> pd.Series:
+    """Naive timestamps on each value's own wall clock; unparseable values become NaT"""
+    if not pd.api.types.is_datetime64_any_dtype(created_at):
+        try:
+            created_at = pd.to_datetime(created_at, format='ISO8601', errors='coerce')
+        except (ValueError, TypeError):
+            # Mixed UTC offsets: parse per value, keeping each one's own wall-clock date
+            created_at = pd.to_datetime(created_at.map(_parse_wall_clock), errors='coerce')
+
+    if getattr(created_at.dt, 'tz', None) is not None:
+        # Compare on the wall-clock date of each timestamp, as date() does
+        created_at = created_at.dt.tz_localize(None)
+    return created_at
+
+
+def _parse_wall_clock(value):
+    try:
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,152 @@
+# benchmarks/db_workload.py
+"""Concurrent checkout and dashboard workload against a local Postgres.
+
+Example:
+    BENCHMARK_DATABASE_URL=postgresql://localhost/omnitrack_bench \\
+        python -m benchmarks.db_workload --seed --orders 50000 --concurrency 16 --json run.json
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Dict
+
+import analytics
+from benchmarks.harness import (
+    LatencyRecorder, benchmark_database_manager, compare_results, format_report, run_workers, write_results
+)
+from benchmarks.seed import bench_product_ids, bench_username, clean, seed
+
+
+def run_checkout_flows(db, product_ids, concurrency: int, iterations: int, items_per_order: int = 3,
+                       users: int = 500, random_seed: int = 42, legacy: bool = False) -> Dict:
+    """Each flow: add_to_cart per item, then checkout() of the cart, as the cart page does.
+
+    legacy=True runs the pre-checkout() sequence instead (reserve_inventory per
+    item, then get_cart_items + create_order); production no longer takes
+    that path, it is kept only as a comparison. Every worker shops as its own
+    bench user, so contention is on product rows (stock updates), not on a
+    shared cart.
+    """
+    recorder = LatencyRecorder()
+
+    def flow(worker_id: int, iteration: int):
+        rng = random.Random(random_seed * 1000003 + worker_id * 10007 + iteration)
+        username = bench_username(1 + worker_id % users)
+        flow_start = time.perf_counter()
+        for product_id in rng.sample(product_ids, min(items_per_order, len(product_ids))):
+            quantity = rng.randint(1, 3)
+            recorder.time('add_to_cart', db.add_to_cart, username, product_id, quantity)
+            if legacy:
+                recorder.time('reserve_inventory', db.reserve_inventory, product_id, username, quantity)
+
+        if legacy:
+            cart_items = recorder.time('get_cart_items', db.get_cart_items, username)
+            order_id = recorder.time('create_order', db.create_order, username, cart_items or [])
+            if order_id:
+                recorder.record('flow:cart_reserve_order', time.perf_counter() - flow_start)
+            return
+
+        order_id, _ = recorder.time('checkout', db.checkout, username) or (None, [])
+        if order_id:
+            recorder.record('flow:cart_checkout', time.perf_counter() - flow_start)
+        else:
+            # Out of stock: start the next flow from an empty cart
+            recorder.record('checkout_rejected', time.perf_counter() - flow_start)
+            db.clear_cart(username)
+
+    run_workers(concurrency, iterations, flow)
+    recorder.stop()
+    return recorder.summary()
+
+
+def run_dashboard_reads(db, concurrency: int, iterations: int, item_loop: int = 50) -> Dict:
+    """Read patterns of the admin/staff pages, including the per-order get_order_items loop"""
+    recorder = LatencyRecorder()
+
+    def order_items_loop(orders):
+        for order in orders[:item_loop]:
+            db.get_order_items(order['id'])
+
+    def reads(worker_id: int, iteration: int):
+        orders = recorder.time('get_all_orders', db.get_all_orders) or []
+        recorder.time(f'get_order_items x{item_loop}', order_items_loop, orders)
+        recorder.time(f'query_orders(include_items) x{item_loop}', db.query_orders, limit=item_loop, include_items=True)
+        recorder.time('get_inventory_transactions', db.get_inventory_transactions)
+        recorder.time('get_inventory_ledger_page', db.get_inventory_ledger_page)
+        recorder.time('get_all_products', db.get_all_products)
+        recorder.time('analytics.get_order_kpis', analytics.get_order_kpis, db)
+
+    run_workers(concurrency, iterations, reads)
+    recorder.stop()
+    return recorder.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark checkout flows and dashboard reads")
+    parser.add_argument('--database-url', help="disposable benchmark database (default: $BENCHMARK_DATABASE_URL)")
+    parser.add_argument('--seed', action='store_true', help="seed benchmark data before running")
+    parser.add_argument('--clean', action='store_true', help="remove benchmark data and exit")
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--transactions', type=int, default=50000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--iterations', type=int, default=25, help="flows per worker")
+    parser.add_argument('--read-iterations', type=int, default=5, help="dashboard read rounds per worker")
+    parser.add_argument('--skip-checkout', action='store_true')
+    parser.add_argument('--legacy-checkout', action='store_true',
+                        help="also run the old reserve_inventory + create_order sequence for comparison")
+    parser.add_argument('--skip-dashboard', action='store_true')
+    parser.add_argument('--json', help="write results to this file")
+    parser.add_argument('--baseline', help="compare p95 against a previous --json file")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed p95 increase vs baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    db = benchmark_database_manager(args.database_url, pool_size=args.concurrency + 2)
+
+    if args.clean:
+        clean(db)
+        print("Benchmark data removed")
+        return
+
+    if args.seed:
+        counts = seed(db, products=args.products, users=args.users, orders=args.orders, transactions=args.transactions)
+        print(f"Seeded {counts}")
+
+    product_ids = bench_product_ids(db)
+    if not product_ids:
+        raise SystemExit("No benchmark data found, run with --seed first")
+
+    results = {}
+    if not args.skip_checkout:
+        results['checkout'] = run_checkout_flows(
+            db, product_ids, args.concurrency, args.iterations, users=args.users
+        )
+        print(format_report(f"\nCheckout flows ({args.concurrency} workers x {args.iterations})", results['checkout']))
+        if args.legacy_checkout:
+            results['checkout_legacy'] = run_checkout_flows(
+                db, product_ids, args.concurrency, args.iterations, users=args.users, legacy=True
+            )
+            print(format_report(
+                f"\nLegacy reserve + create_order flows, comparison only ({args.concurrency} workers x {args.iterations})",
+                results['checkout_legacy']
+            ))
+    if not args.skip_dashboard:
+        results['dashboard'] = run_dashboard_reads(db, args.concurrency, args.read_iterations)
+        print(format_report(f"\nDashboard reads ({args.concurrency} workers x {args.read_iterations})", results['dashboard']))
+
+    if args.json:
+        write_results(args.json, results)
+
+    if args.baseline:
+        regressions = compare_results(args.baseline, results, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            print('\n'.join(regressions))
+            sys.exit(1)
+        print("\nNo p95 regressions against baseline")
+
+
+if __name__ == '__main__':
+    main()
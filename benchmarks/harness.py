@@ -0,0 +1,133 @@
+# benchmarks/harness.py
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+BENCHMARK_DATABASE_ENV = 'BENCHMARK_DATABASE_URL'
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LatencyRecorder:
+    """Thread-safe collection of per-operation latencies"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def time(self, name: str, func: Callable, *args, **kwargs):
+        """Call func, recording its latency under name; failures are counted, not raised"""
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.errors[name] = self.errors.get(name, 0) + 1
+            return None
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.samples.setdefault(name, []).append(elapsed)
+        return result
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self.samples.setdefault(name, []).append(seconds)
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def summary(self) -> Dict[str, Dict]:
+        """Per operation: count, errors, throughput (ops/s over the run) and latency percentiles in ms"""
+        wall = (self.finished or time.perf_counter()) - self.started
+        with self._lock:
+            names = sorted(set(self.samples) | set(self.errors))
+            result = {}
+            for name in names:
+                values = sorted(self.samples.get(name, []))
+                result[name] = {
+                    'count': len(values),
+                    'errors': self.errors.get(name, 0),
+                    'throughput': len(values) / wall if wall > 0 else 0.0,
+                    'p50_ms': percentile(values, 50) * 1000,
+                    'p95_ms': percentile(values, 95) * 1000,
+                    'p99_ms': percentile(values, 99) * 1000,
+                    'max_ms': (values[-1] if values else 0.0) * 1000,
+                }
+        return result
+
+
+def run_workers(concurrency: int, iterations: int, work: Callable[[int, int], None]):
+    """Run work(worker_id, iteration) `iterations` times on each of `concurrency` threads"""
+    def worker(worker_id: int):
+        for iteration in range(iterations):
+            work(worker_id, iteration)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='bench') as executor:
+        futures = [executor.submit(worker, worker_id) for worker_id in range(concurrency)]
+        for future in futures:
+            future.result()
+
+
+def format_report(title: str, summary: Dict[str, Dict]) -> str:
+    lines = [title, f"{'operation':<36}{'count':>8}{'errors':>8}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+    for name, row in summary.items():
+        lines.append(
+            f"{name:<36}{row['count']:>8}{row['errors']:>8}{row['throughput']:>10.1f}"
+            f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['max_ms']:>10.2f}"
+        )
+    return '\n'.join(lines)
+
+
+def write_results(path: str, results: Dict):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True, default=str)
+
+
+def compare_results(baseline_path: str, results: Dict[str, Dict[str, Dict]], tolerance: float = 0.2) -> List[str]:
+    """p95 regressions beyond tolerance against a previous write_results() file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for section, operations in results.items():
+        for name, row in operations.items():
+            previous = baseline.get(section, {}).get(name)
+            if not previous or not previous.get('p95_ms'):
+                continue
+            change = row['p95_ms'] / previous['p95_ms'] - 1
+            if change > tolerance:
+                regressions.append(
+                    f"{section}/{name}: p95 {previous['p95_ms']:.2f} ms -> {row['p95_ms']:.2f} ms (+{change:.0%})"
+                )
+    return regressions
+
+
+def benchmark_database_manager(database_url: str = None, pool_size: int = None):
+    """DatabaseManager pointed at the benchmark database.
+
+    The URL must be given explicitly (argument or BENCHMARK_DATABASE_URL) so a
+    benchmark never seeds the application's DATABASE_URL by accident.
+    """
+    database_url = database_url or os.getenv(BENCHMARK_DATABASE_ENV)
+    if not database_url:
+        raise SystemExit(f"Set {BENCHMARK_DATABASE_ENV} or pass --database-url (a disposable local database)")
+
+    os.environ['DATABASE_URL'] = database_url
+    if pool_size:
+        os.environ.setdefault('DB_POOL_MAX_SIZE', str(pool_size))
+
+    from database import DatabaseManager
+    return DatabaseManager()
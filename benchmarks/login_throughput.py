@@ -0,0 +1,110 @@
+# benchmarks/login_throughput.py
+"""Login storm benchmark: bcrypt inline vs. the bounded PasswordHasher pool.
+
+Logins rejected by a full hasher queue (HasherBusy) show up as errors.
+
+Examples:
+    python -m benchmarks.login_throughput --concurrency 32 --iterations 10 --rounds 12
+    BENCHMARK_DATABASE_URL=postgresql://localhost/omnitrack_bench \\
+        python -m benchmarks.login_throughput --with-db
+"""
+import argparse
+import itertools
+import threading
+import time
+from typing import Dict
+
+import bcrypt
+
+from benchmarks.harness import LatencyRecorder, benchmark_database_manager, format_report, run_workers, write_results
+from benchmarks.seed import BENCH_PASSWORD, BENCH_USER_PREFIX, bench_username
+from password_hashing import PasswordHasher
+
+
+def _background_reruns(recorder: LatencyRecorder, stop: threading.Event):
+    """Stand-in for other sessions' script reruns: small CPU-bound steps, timed"""
+    while not stop.is_set():
+        recorder.time('other_session_rerun', sum, range(200000))
+        time.sleep(0.01)
+
+
+def run_storm(verify, concurrency: int, iterations: int, label: str) -> Dict:
+    recorder = LatencyRecorder()
+    stop = threading.Event()
+    background = threading.Thread(target=_background_reruns, args=(recorder, stop), daemon=True)
+    background.start()
+
+    run_workers(concurrency, iterations, lambda worker_id, iteration: recorder.time(label, verify, worker_id))
+
+    stop.set()
+    background.join()
+    recorder.stop()
+    return recorder.summary()
+
+
+def run_hashing_only(concurrency: int, iterations: int, rounds: int, workers: int, queue: int) -> Dict:
+    password = BENCH_PASSWORD.encode('utf-8')
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+    hasher = PasswordHasher(rounds=rounds, max_workers=workers, max_queue=queue)
+
+    results = {
+        'inline': run_storm(lambda _: bcrypt.checkpw(password, hashed), concurrency, iterations, 'checkpw inline'),
+        'pool': run_storm(lambda _: hasher.verify(BENCH_PASSWORD, hashed.decode('utf-8')), concurrency, iterations, 'PasswordHasher.verify'),
+    }
+    hasher.shutdown()
+    return results
+
+
+def run_with_db(database_url: str, concurrency: int, iterations: int, users: int, rounds: int,
+                workers: int, queue: int) -> Dict:
+    from auth import AuthManager
+
+    db = benchmark_database_manager(database_url, pool_size=concurrency + 2)
+    auth = AuthManager(db, PasswordHasher(rounds=rounds, max_workers=workers, max_queue=queue))
+
+    login = run_storm(
+        lambda worker_id: auth.authenticate_user(bench_username(1 + worker_id % users), BENCH_PASSWORD),
+        concurrency, iterations, 'authenticate_user'
+    )
+
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def register(_):
+        with lock:
+            n = next(counter)
+        return auth.register_user(f"{BENCH_USER_PREFIX}signup_{time.time_ns()}_{n}", BENCH_PASSWORD)
+
+    signup = run_storm(register, concurrency, iterations, 'register_user')
+    auth.hasher.shutdown()
+    return {'login': login, 'signup': signup}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark login throughput and its impact on other sessions")
+    parser.add_argument('--concurrency', type=int, default=16, help="simultaneous logins")
+    parser.add_argument('--iterations', type=int, default=10, help="logins per worker")
+    parser.add_argument('--rounds', type=int, default=12, help="bcrypt work factor")
+    parser.add_argument('--workers', type=int, default=0, help="PasswordHasher workers (default: CPU count)")
+    parser.add_argument('--queue', type=int, default=32, help="PasswordHasher queue depth")
+    parser.add_argument('--with-db', action='store_true', help="go through AuthManager against seeded bench users")
+    parser.add_argument('--database-url', help="disposable benchmark database (default: $BENCHMARK_DATABASE_URL)")
+    parser.add_argument('--users', type=int, default=500, help="seeded bench users to log in as")
+    parser.add_argument('--json', help="write results to this file")
+    args = parser.parse_args()
+
+    if args.with_db:
+        results = run_with_db(args.database_url, args.concurrency, args.iterations, args.users,
+                              args.rounds, args.workers or None, args.queue)
+    else:
+        results = run_hashing_only(args.concurrency, args.iterations, args.rounds, args.workers or None, args.queue)
+
+    for section, summary in results.items():
+        print(format_report(f"\n{section} ({args.concurrency} concurrent x {args.iterations}, rounds={args.rounds})", summary))
+
+    if args.json:
+        write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
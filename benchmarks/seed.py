@@ -0,0 +1,141 @@
+# benchmarks/seed.py
+from typing import Dict, List
+
+import bcrypt
+
+# Seeded rows are recognisable by these prefixes so they can be cleaned up
+BENCH_SKU_PREFIX = 'BENCH-'
+BENCH_USER_PREFIX = 'bench_user_'
+BENCH_PASSWORD = 'benchmark'
+
+CATEGORIES = ['Sports', 'Footwear', 'Accessories', 'Fitness', 'Outdoor', 'Apparel', 'Nutrition', 'Cycling']
+STATUSES = ['placed', 'paid', 'delivered', 'delivered', 'delivered', 'cancelled']
+
+
+def bench_username(n: int) -> str:
+    return f"{BENCH_USER_PREFIX}{n}"
+
+
+def seed(db, products: int = 1000, users: int = 500, orders: int = 20000, transactions: int = 50000,
+         days: int = 180, random_seed: float = 0.42) -> Dict:
+    """Generate benchmark data server-side with generate_series.
+
+    Data is deterministic for a given scale and random_seed. Order items pick
+    1-4 products per order; stock is set high enough that concurrent flows
+    don't run out. Rollups are rebuilt afterwards.
+    """
+    # Low-cost hash: the login benchmark measures hashing separately
+    password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds=4)).decode('utf-8')
+
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT setseed(%s)", (random_seed,))
+
+        cursor.execute("""
+            INSERT INTO products (name, description, price, stock_quantity, category, sku)
+            SELECT 'Bench Product ' || g, 'Benchmark product number ' || g,
+                round((1 + random() * 199)::numeric, 2), 1000000,
+                (%s::varchar[])[1 + g %% %s], %s || g
+            FROM generate_series(1, %s) g
+        """, (CATEGORIES, len(CATEGORIES), BENCH_SKU_PREFIX, products))
+
+        cursor.execute("""
+            INSERT INTO users (username, password_hash, role)
+            SELECT %s || g, %s, 'customer'
+            FROM generate_series(1, %s) g
+            ON CONFLICT (username) DO NOTHING
+        """, (BENCH_USER_PREFIX, password_hash, users))
+
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM orders")
+        first_order_id = cursor.fetchone()[0] + 1
+
+        cursor.execute("""
+            INSERT INTO orders (username, status, total_amount, created_at, updated_at)
+            SELECT %s || (1 + floor(random() * %s)::int),
+                (%s::varchar[])[1 + floor(random() * %s)::int],
+                0, ts, ts
+            FROM (
+                SELECT CURRENT_TIMESTAMP - random() * make_interval(days => %s) AS ts
+                FROM generate_series(1, %s)
+                ORDER BY 1
+            ) s
+        """, (BENCH_USER_PREFIX, users, STATUSES, len(STATUSES), days, orders))
+
+        # Products are picked by a fixed hash of (order, line) so reruns match
+        cursor.execute("""
+            WITH bench AS (
+                SELECT array_agg(id ORDER BY id) AS ids, COUNT(*) AS n
+                FROM products WHERE sku LIKE %s
+            )
+            INSERT INTO order_items (order_id, product_id, product_name, quantity, unit_price)
+            SELECT o.id, p.id, p.name, 1 + (o.id + k) %% 3, p.price
+            FROM orders o
+            CROSS JOIN bench
+            CROSS JOIN LATERAL generate_series(1, 1 + o.id %% 4) k
+            JOIN products p ON p.id = bench.ids[1 + (o.id::bigint * 7919 + k * 104729) %% bench.n]
+            WHERE o.id >= %s
+        """, (BENCH_SKU_PREFIX + '%', first_order_id))
+
+        cursor.execute("""
+            UPDATE orders o SET total_amount = s.total
+            FROM (
+                SELECT order_id, SUM(quantity * unit_price) AS total
+                FROM order_items
+                WHERE order_id >= %s
+                GROUP BY order_id
+            ) s
+            WHERE o.id = s.order_id
+        """, (first_order_id,))
+
+        cursor.execute("""
+            WITH bench AS (
+                SELECT array_agg(id ORDER BY id) AS ids, COUNT(*) AS n
+                FROM products WHERE sku LIKE %s
+            )
+            INSERT INTO inventory_transactions (product_id, transaction_type, quantity_change, notes, created_at)
+            SELECT bench.ids[1 + (g::bigint * 7919) %% bench.n],
+                (ARRAY['restock', 'sale', 'manual_update', 'reserve'])[1 + g %% 4],
+                CASE WHEN g %% 4 = 0 THEN 50 ELSE -(1 + g %% 5) END,
+                'Benchmark seed',
+                CURRENT_TIMESTAMP - random() * make_interval(days => %s)
+            FROM generate_series(1, %s) g
+            CROSS JOIN bench
+        """, (BENCH_SKU_PREFIX + '%', days, transactions))
+
+        conn.commit()
+
+    db.rebuild_sales_rollups()
+    db.catalog_cache.invalidate()
+    return {'products': products, 'users': users, 'orders': orders, 'transactions': transactions}
+
+
+def bench_product_ids(db) -> List[int]:
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM products WHERE sku LIKE %s ORDER BY id", (BENCH_SKU_PREFIX + '%',))
+        return [row[0] for row in cursor.fetchall()]
+
+
+def clean(db):
+    """Remove everything seed() and the benchmark flows created"""
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        bench_products = "SELECT id FROM products WHERE sku LIKE %s"
+        bench_users = "SELECT username FROM users WHERE username LIKE %s"
+        sku_like = BENCH_SKU_PREFIX + '%'
+        user_like = BENCH_USER_PREFIX + '%'
+
+        cursor.execute(f"""
+            DELETE FROM order_items WHERE order_id IN (SELECT id FROM orders WHERE username IN ({bench_users}))
+                OR product_id IN ({bench_products})
+        """, (user_like, sku_like))
+        cursor.execute(f"DELETE FROM orders WHERE username IN ({bench_users})", (user_like,))
+        cursor.execute(f"DELETE FROM shopping_cart WHERE username IN ({bench_users}) OR product_id IN ({bench_products})", (user_like, sku_like))
+        cursor.execute(f"DELETE FROM reserved_inventory WHERE username IN ({bench_users}) OR product_id IN ({bench_products})", (user_like, sku_like))
+        cursor.execute(f"DELETE FROM inventory_transactions WHERE product_id IN ({bench_products})", (sku_like,))
+        cursor.execute("DELETE FROM products WHERE sku LIKE %s", (sku_like,))
+        cursor.execute("DELETE FROM users WHERE username LIKE %s", (user_like,))
+        conn.commit()
+
+    db.rebuild_sales_rollups()
+    db.catalog_cache.invalidate()
@@ -0,0 +1,190 @@
+# benchmarks/startup.py
+"""Cold-start budget for the Streamlit entry point.
+
+Every measurement runs in a fresh interpreter:
+  - import time of the modules app.py imports at top level, and which heavy
+    libraries they pull in beyond what streamlit itself loads
+  - first and second render of app.main() per role via streamlit's AppTest
+    (needs a database: --database-url or BENCHMARK_DATABASE_URL)
+
+Example:
+    python -m benchmarks.startup --max-import-ms 300 --skip-render
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.harness import BENCHMARK_DATABASE_ENV, write_results
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_ROOT, 'app.py')
+
+# Libraries only the pages/functions that tabulate or chart should load
+LAZY_MODULES = ['pandas', 'plotly.express', 'numpy']
+
+ROLE_SESSIONS = {
+    'login': {'authenticated': False, 'user_role': None, 'username': None},
+    'customer': {'authenticated': True, 'user_role': 'customer', 'username': 'customer_demo'},
+    'staff': {'authenticated': True, 'user_role': 'staff', 'username': 'staff_demo'},
+    'admin': {'authenticated': True, 'user_role': 'admin', 'username': 'admin_demo'},
+}
+
+
+def app_top_level_imports(path: str = APP_PATH) -> List[str]:
+    """Modules app.py imports at module level, in order (function-level imports are lazy)"""
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def _child_imports() -> Dict:
+    import importlib
+
+    start = time.perf_counter()
+    import streamlit  # noqa: F401 - baseline every session pays anyway
+    streamlit_ms = (time.perf_counter() - start) * 1000
+    baseline = set(sys.modules)
+
+    per_module = {}
+    app_start = time.perf_counter()
+    for module in app_top_level_imports():
+        if module == 'streamlit':
+            continue
+        module_start = time.perf_counter()
+        importlib.import_module(module)
+        per_module[module] = (time.perf_counter() - module_start) * 1000
+    app_imports_ms = (time.perf_counter() - app_start) * 1000
+
+    return {
+        'streamlit_ms': streamlit_ms,
+        'app_imports_ms': app_imports_ms,
+        'per_module_ms': per_module,
+        'lazy_modules_loaded': [m for m in LAZY_MODULES if m in sys.modules and m not in baseline],
+    }
+
+
+def _child_render(role: str) -> Dict:
+    from streamlit.testing.v1 import AppTest
+
+    app_test = AppTest.from_file(APP_PATH, default_timeout=120)
+    for key, value in ROLE_SESSIONS[role].items():
+        app_test.session_state[key] = value
+
+    start = time.perf_counter()
+    app_test.run()
+    first_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    app_test.run()
+    rerun_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        'first_render_ms': first_ms,
+        'rerun_ms': rerun_ms,
+        'exceptions': [str(e.value) for e in app_test.exception],
+        'lazy_modules_loaded': [m for m in LAZY_MODULES if m in sys.modules],
+    }
+
+
+def _run_child(args: List[str], env: Dict = None) -> Dict:
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.startup'] + args,
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_imports(repeat: int) -> Dict:
+    runs = [_run_child(['--child-imports']) for _ in range(repeat)]
+    return {
+        'streamlit_ms': statistics.median(r['streamlit_ms'] for r in runs),
+        'app_imports_ms': statistics.median(r['app_imports_ms'] for r in runs),
+        'per_module_ms': {
+            module: statistics.median(r['per_module_ms'][module] for r in runs)
+            for module in runs[0]['per_module_ms']
+        },
+        'lazy_modules_loaded': runs[0]['lazy_modules_loaded'],
+    }
+
+
+def measure_render(role: str, repeat: int, database_url: str) -> Dict:
+    env = dict(os.environ, DATABASE_URL=database_url)
+    runs = [_run_child(['--child-render', role], env=env) for _ in range(repeat)]
+    return {
+        'first_render_ms': statistics.median(r['first_render_ms'] for r in runs),
+        'rerun_ms': statistics.median(r['rerun_ms'] for r in runs),
+        'exceptions': runs[-1]['exceptions'],
+        'lazy_modules_loaded': runs[-1]['lazy_modules_loaded'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import and first-render time of the Streamlit app")
+    parser.add_argument('--repeat', type=int, default=3, help="fresh interpreters per measurement (median reported)")
+    parser.add_argument('--roles', default='login,customer,staff,admin')
+    parser.add_argument('--skip-render', action='store_true', help="imports only, no database needed")
+    parser.add_argument('--database-url', help="database for render runs (default: $BENCHMARK_DATABASE_URL)")
+    parser.add_argument('--max-import-ms', type=float, help="fail if app imports (excluding streamlit) take longer")
+    parser.add_argument('--max-render-ms', type=float, help="fail if any role's first render takes longer")
+    parser.add_argument('--json', help="write results to this file")
+    parser.add_argument('--child-imports', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--child-render', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_imports:
+        print(json.dumps(_child_imports()))
+        return
+    if args.child_render:
+        print(json.dumps(_child_render(args.child_render)))
+        return
+
+    failures = []
+    results = {'imports': measure_imports(args.repeat)}
+    imports = results['imports']
+    print(f"streamlit import: {imports['streamlit_ms']:.0f} ms (baseline)")
+    print(f"app.py imports:   {imports['app_imports_ms']:.0f} ms")
+    for module, ms in sorted(imports['per_module_ms'].items(), key=lambda item: -item[1]):
+        print(f"  {module:<28}{ms:>8.1f} ms")
+    if imports['lazy_modules_loaded']:
+        failures.append(f"app.py imports load {', '.join(imports['lazy_modules_loaded'])} at startup")
+    if args.max_import_ms and imports['app_imports_ms'] > args.max_import_ms:
+        failures.append(f"app imports took {imports['app_imports_ms']:.0f} ms (budget {args.max_import_ms:.0f} ms)")
+
+    if not args.skip_render:
+        database_url = args.database_url or os.getenv(BENCHMARK_DATABASE_ENV)
+        if not database_url:
+            raise SystemExit(f"Set {BENCHMARK_DATABASE_ENV} or pass --database-url, or use --skip-render")
+        results['render'] = {}
+        print(f"\n{'role':<12}{'first render ms':>18}{'rerun ms':>12}  heavy modules loaded")
+        for role in args.roles.split(','):
+            render = measure_render(role, args.repeat, database_url)
+            results['render'][role] = render
+            print(f"{role:<12}{render['first_render_ms']:>18.0f}{render['rerun_ms']:>12.0f}  {', '.join(render['lazy_modules_loaded']) or '-'}")
+            if render['exceptions']:
+                failures.append(f"{role}: app raised {render['exceptions'][0]}")
+            if args.max_render_ms and render['first_render_ms'] > args.max_render_ms:
+                failures.append(f"{role}: first render {render['first_render_ms']:.0f} ms (budget {args.max_render_ms:.0f} ms)")
+
+    if args.json:
+        write_results(args.json, results)
+
+    if failures:
+        print("\nStartup budget exceeded:")
+        print('\n'.join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
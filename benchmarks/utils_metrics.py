@@ -0,0 +1,135 @@
+# benchmarks/utils_metrics.py
+"""Row-dict utils helpers vs. their batch_metrics columnar equivalents.
+
+Builds synthetic orders and products in memory (no database), checks that
+both implementations agree, and reports the time of each. Building the typed
+frames (batch_metrics.orders_frame/products_frame) is timed once, separately:
+it is paid when rows are loaded, not per metric.
+
+Example:
+    python -m benchmarks.utils_metrics --orders 1000000 --products 100000
+"""
+import argparse
+import math
+import random
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, List
+
+import batch_metrics
+import utils
+from benchmarks.harness import write_results
+
+
+def make_orders(n: int, seed: int = 42) -> List[Dict]:
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    statuses = ['placed', 'paid', 'delivered', 'delivered', 'cancelled']
+    return [
+        {
+            'id': i,
+            'username': f"user_{rng.randrange(5000)}",
+            'status': rng.choice(statuses),
+            'total_amount': Decimal(rng.randrange(500, 50000)) / 100,
+            'created_at': (start + timedelta(seconds=rng.randrange(365 * 86400))).isoformat(),
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def make_products(n: int, seed: int = 42) -> List[Dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            'id': i,
+            'name': f"Product {i}",
+            'price': Decimal(rng.randrange(100, 20000)) / 100,
+            'stock_quantity': rng.randrange(0, 200),
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def _timed(func: Callable, repeat: int):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _same(row_result, batch_result) -> bool:
+    if isinstance(row_result, list):
+        return [r['id'] for r in row_result] == batch_result['id'].tolist()
+    if isinstance(row_result, dict):
+        return row_result.keys() == batch_result.keys() and all(
+            math.isclose(float(row_result[k]), float(batch_result[k]), rel_tol=1e-9) for k in row_result
+        )
+    return math.isclose(float(row_result), float(batch_result), rel_tol=1e-9)
+
+
+def _cases(orders, products, orders_df, products_df, start_date, end_date):
+    """(name, row version, columnar version) for each helper"""
+    return [
+        ('calculate_order_metrics', lambda: utils.calculate_order_metrics(orders),
+         lambda: batch_metrics.calculate_order_metrics(orders_df)),
+        ('get_order_status_counts', lambda: utils.get_order_status_counts(orders),
+         lambda: batch_metrics.get_order_status_counts(orders_df)),
+        ('filter_orders_by_date_range', lambda: utils.filter_orders_by_date_range(orders, start_date, end_date),
+         lambda: batch_metrics.filter_orders_by_date_range(orders_df, start_date, end_date)),
+        ('check_low_stock', lambda: utils.check_low_stock(products),
+         lambda: batch_metrics.check_low_stock(products_df)),
+        ('calculate_inventory_value', lambda: utils.calculate_inventory_value(products),
+         lambda: batch_metrics.calculate_inventory_value(products_df)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare utils metric helpers with batch_metrics")
+    parser.add_argument('--orders', type=int, default=1000000)
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3, help="best of N runs")
+    parser.add_argument('--json', help="write results to this file")
+    args = parser.parse_args()
+
+    orders = make_orders(args.orders)
+    products = make_products(args.products)
+
+    frame_build, (orders_df, products_df) = _timed(
+        lambda: (batch_metrics.orders_frame(orders), batch_metrics.products_frame(products)), 1
+    )
+    start_date, end_date = date(2024, 3, 1), date(2024, 6, 30)
+
+    # Empty input must agree too (the row helpers return zeros / empty lists)
+    empty_cases = _cases([], [], batch_metrics.orders_frame([]), batch_metrics.products_frame([]), start_date, end_date)
+    empty_mismatches = [name for name, row_version, batch_version in empty_cases
+                        if not _same(row_version(), batch_version())]
+
+    cases = _cases(orders, products, orders_df, products_df, start_date, end_date)
+
+    print(f"{args.orders:,} orders, {args.products:,} products (DataFrame build: {frame_build * 1000:.0f} ms, once)")
+    print(f"empty input: {'all match' if not empty_mismatches else 'MISMATCH in ' + ', '.join(empty_mismatches)}")
+    print(f"{'helper':<30}{'rows ms':>12}{'columnar ms':>14}{'speedup':>10}  match")
+    results = {'frame_build_ms': frame_build * 1000, 'empty_input_match': not empty_mismatches, 'helpers': {}}
+    mismatches = [f"{name} (empty input)" for name in empty_mismatches]
+    for name, row_version, batch_version in cases:
+        row_time, row_result = _timed(row_version, args.repeat)
+        batch_time, batch_result = _timed(batch_version, args.repeat)
+        match = _same(row_result, batch_result)
+        if not match:
+            mismatches.append(name)
+        results['helpers'][name] = {'rows_ms': row_time * 1000, 'columnar_ms': batch_time * 1000, 'match': match}
+        print(f"{name:<30}{row_time * 1000:>12.1f}{batch_time * 1000:>14.1f}{row_time / batch_time:>9.1f}x  {'yes' if match else 'NO'}")
+
+    if args.json:
+        write_results(args.json, results)
+
+    if mismatches:
+        raise SystemExit(f"Results differ for: {', '.join(mismatches)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import psycopg2
+import psycopg2.extensions
+import select
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Postgres channel used to tell other processes that the product table changed
+CATALOG_CHANNEL = 'catalog_changed'
+
+
+class CatalogCache:
+    """In-process cache of the product catalog.
+
+    Entries expire after `ttl` seconds and are dropped explicitly by
+    invalidate() whenever this process writes to products. With a listener
+    started, NOTIFYs from other processes invalidate the cache as well.
+    """
+
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._products: Optional[List[Dict]] = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._version = 0
+        self._listener: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped on every invalidation, for consumers that derive data from the catalog"""
+        return self._generation
+
+    def get(self, loader: Callable[[], List[Dict]]) -> List[Dict]:
+        """Return the cached product rows, calling loader() on a miss.
+
+        The returned list is a fresh copy, but the row dicts are shared and
+        must be treated as read-only.
+        """
+        return self.snapshot(loader)[1]
+
+    def snapshot(self, loader: Callable[[], List[Dict]]) -> Tuple[Optional[int], List[Dict]]:
+        """Like get(), plus a version that changes whenever a new set of rows is stored.
+
+        The version is None when the rows were not cached (cache disabled or
+        invalidated mid-load), so derived data must not be reused for them.
+        """
+        if not self.enabled:
+            return None, loader()
+
+        with self._lock:
+            if self._products is not None and time.monotonic() - self._loaded_at < self.ttl:
+                self.hits += 1
+                return self._version, list(self._products)
+            self.misses += 1
+            generation = self._generation
+
+        products = loader()
+
+        with self._lock:
+            # Don't store rows that were read before a concurrent invalidation
+            if generation == self._generation:
+                self._products = products
+                self._loaded_at = time.monotonic()
+                self._version += 1
+                return self._version, list(products)
+        return None, list(products)
+
+    def invalidate(self):
+        with self._lock:
+            self._products = None
+            self._generation += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'generation': self._generation,
+                'cached_rows': len(self._products) if self._products is not None else 0,
+                'listening': self._listener is not None and self._listener.is_alive(),
+            }
+
+    def start_listener(self, dsn: str, channel: str = CATALOG_CHANNEL, retry_delay: float = 5.0):
+        """Invalidate on NOTIFY from other processes, using a dedicated connection"""
+        if self._listener is not None and self._listener.is_alive():
+            return
+        self._stop.clear()
+        self._listener = threading.Thread(
+            target=self._listen, args=(dsn, channel, retry_delay), name='catalog-cache-listener', daemon=True
+        )
+        self._listener.start()
+
+    def stop_listener(self):
+        self._stop.set()
+
+    def _listen(self, dsn: str, channel: str, retry_delay: float):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {channel}")
+                # Changes may have been missed while (re)connecting
+                self.invalidate()
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    if conn.notifies:
+                        conn.notifies.clear()
+                        self.invalidate()
+            except psycopg2.Error:
+                self._stop.wait(retry_delay)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
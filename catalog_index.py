@@ -0,0 +1,144 @@
+# catalog_index.py
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Sort keys accepted by CatalogIndex.select (same names as PRODUCT_SORT_OPTIONS)
+INDEX_SORT_KEYS = ('name', 'price_asc', 'price_desc', 'stock')
+
+# Above this share of changed rows a full re-sort beats repairing a permutation
+_REPAIR_LIMIT = 1 / 16
+
+
+class CatalogIndex:
+    """Columnar snapshot of the product catalog for browsing.
+
+    Rows are aligned by product id; price, stock and category code live in
+    NumPy arrays and every sort option has a precomputed permutation, so a
+    category filter is a boolean mask over a permutation and a page is a
+    slice of it. Ties sort by name, matching the shop's previous stable sorts.
+
+    Build with CatalogIndex.build(products, previous=old_index): permutations
+    whose sort column did not change are reused, and a handful of changed
+    prices or stock levels are repaired in place instead of re-sorted.
+    """
+
+    def __init__(self, rows: List[Dict], ids, price, stock, category_codes, categories: List[str],
+                 name_rank, orders: Dict[str, np.ndarray], version=None):
+        self.rows = rows
+        self.ids = ids
+        self.price = price
+        self.stock = stock
+        self.category_codes = category_codes
+        self.categories = categories
+        self.name_rank = name_rank
+        self.orders = orders
+        self.version = version
+        self._category_lookup = {category: code for code, category in enumerate(categories)}
+        # (category, sort) -> filtered permutation; the index is immutable so these never go stale
+        self._filtered: Dict[Tuple[str, str], np.ndarray] = {}
+
+    @classmethod
+    def build(cls, products: List[Dict], previous: 'CatalogIndex' = None, version=None) -> 'CatalogIndex':
+        rows = sorted(products, key=lambda p: p['id'])
+        ids = np.fromiter((p['id'] for p in rows), dtype=np.int64, count=len(rows))
+        price = np.fromiter((float(p['price']) for p in rows), dtype=np.float64, count=len(rows))
+        stock = np.fromiter((p['stock_quantity'] for p in rows), dtype=np.int64, count=len(rows))
+
+        categories = sorted({p['category'] for p in rows if p['category']})
+        lookup = {category: code for code, category in enumerate(categories)}
+        category_codes = np.fromiter(
+            (lookup.get(p['category'], -1) for p in rows), dtype=np.int32, count=len(rows)
+        )
+
+        same_rows = (
+            previous is not None
+            and np.array_equal(previous.ids, ids)
+            and all(old['name'] == new['name'] for old, new in zip(previous.rows, rows))
+        )
+
+        if same_rows:
+            name_rank = previous.name_rank
+            orders = {'name': previous.orders['name']}
+            orders['price_asc'] = _update_order(previous.orders['price_asc'], previous.price, price, name_rank)
+            orders['price_desc'] = _update_order(previous.orders['price_desc'], -previous.price, -price, name_rank)
+            orders['stock'] = _update_order(previous.orders['stock'], -previous.stock, -stock, name_rank)
+        else:
+            name_order = np.array(
+                sorted(range(len(rows)), key=lambda i: (rows[i]['name'], rows[i]['id'])), dtype=np.int64
+            )
+            name_rank = np.empty(len(rows), dtype=np.int64)
+            name_rank[name_order] = np.arange(len(rows))
+            orders = {
+                'name': name_order,
+                'price_asc': np.lexsort((name_rank, price)),
+                'price_desc': np.lexsort((name_rank, -price)),
+                'stock': np.lexsort((name_rank, -stock)),
+            }
+
+        return cls(rows, ids, price, stock, category_codes, categories, name_rank, orders, version)
+
+    def selection(self, category: str = None, sort: str = 'name') -> 'CatalogSelection':
+        """Rows in category (all when None) in sort order, for counting and paging"""
+        if sort not in INDEX_SORT_KEYS:
+            raise ValueError(f"Unknown product sort option: {sort}")
+        order = self.orders[sort]
+
+        if category:
+            code = self._category_lookup.get(category)
+            if code is None:
+                return CatalogSelection(self.rows, order[:0])
+            filtered = self._filtered.get((category, sort))
+            if filtered is None:
+                filtered = order[self.category_codes[order] == code]
+                self._filtered[(category, sort)] = filtered
+            order = filtered
+
+        return CatalogSelection(self.rows, order)
+
+    def select(self, category: str = None, sort: str = 'name', limit: int = None,
+               offset: int = 0) -> Tuple[int, List[Dict]]:
+        """Filter by category, sort and paginate. Returns (total_count, page_rows)."""
+        selection = self.selection(category, sort)
+        return len(selection), selection.page(limit, offset)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+class CatalogSelection:
+    """One category/sort view of a CatalogIndex: len() is the match count, page() a slice"""
+
+    def __init__(self, rows: List[Dict], order: np.ndarray):
+        self.rows = rows
+        self.order = order
+
+    def page(self, limit: int = None, offset: int = 0) -> List[Dict]:
+        end = len(self.order) if limit is None else offset + limit
+        return [self.rows[i] for i in self.order[offset:end]]
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+
+def _update_order(order: np.ndarray, old_key: np.ndarray, new_key: np.ndarray, name_rank: np.ndarray) -> np.ndarray:
+    """Permutation sorted by (new_key, name_rank), derived from the one sorted by (old_key, name_rank)"""
+    changed = old_key != new_key
+    n_changed = int(np.count_nonzero(changed))
+    if n_changed == 0:
+        return order
+    if n_changed > len(order) * _REPAIR_LIMIT:
+        return np.lexsort((name_rank, new_key))
+
+    # Drop the moved rows, then insert each at its (key, name) position
+    keep = order[~changed[order]]
+    moved = np.flatnonzero(changed)
+    moved = moved[np.lexsort((name_rank[moved], new_key[moved]))]
+
+    keep_keys = new_key[keep]
+    positions = np.empty(len(moved), dtype=np.int64)
+    for i, row in enumerate(moved):
+        left = np.searchsorted(keep_keys, new_key[row], side='left')
+        right = np.searchsorted(keep_keys, new_key[row], side='right')
+        positions[i] = left + np.searchsorted(name_rank[keep[left:right]], name_rank[row])
+    return np.insert(keep, positions, moved)
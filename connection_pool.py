@@ -0,0 +1,274 @@
+import psycopg2
+import psycopg2.extensions
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+from instrumentation import instrumented_cursor
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the checkout timeout"""
+
+
+class PooledConnection:
+    """Thin proxy around a psycopg2 connection checked out from a ConnectionPool.
+
+    Behaves like the underlying connection, except that close() hands the
+    connection back to the pool instead of closing the socket, so existing
+    code written against psycopg2.connect() keeps working unchanged.
+    """
+
+    def __init__(self, pool: 'ConnectionPool', conn):
+        self._pool = pool
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            raise psycopg2.InterfaceError("connection already returned to pool")
+        if self._pool.query_stats is not None:
+            return instrumented_cursor(conn, self._pool.query_stats, *args, **kwargs)
+        return conn.cursor(*args, **kwargs)
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            raise psycopg2.InterfaceError("connection already returned to pool")
+        return getattr(conn, name)
+
+    @property
+    def raw_connection(self):
+        return self._conn
+
+    def close(self):
+        """Return the connection to the pool"""
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.putconn(conn)
+
+    def __del__(self):
+        # Last resort only: callers return connections via ConnectionPool.connection()
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Thread-safe, blocking PostgreSQL connection pool.
+
+    - keeps between min_size and max_size physical connections
+    - blocks up to `timeout` seconds when every connection is in use
+    - health-checks idle connections on checkout and transparently replaces
+      broken ones (reconnect-on-failure)
+    - records statistics for sizing the pool (see stats())
+    """
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10, timeout: float = 30.0,
+                 health_check_interval: float = 30.0, connect_retries: int = 3, retry_delay: float = 0.5,
+                 query_stats=None):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size: require 0 <= min_size <= max_size and max_size >= 1")
+
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.connect_retries = connect_retries
+        self.retry_delay = retry_delay
+        # Optional instrumentation.QueryStats recording checkout and statement timings
+        self.query_stats = query_stats
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle: List[tuple] = []  # (connection, last_used_monotonic)
+        self._size = 0  # physical connections, idle + in use
+        self._in_use = 0
+        self._closed = False
+
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'timeouts': 0,
+            'connections_created': 0,
+            'connections_discarded': 0,
+            'health_check_failures': 0,
+            'connect_failures': 0,
+            'max_in_use': 0,
+        }
+
+        for _ in range(min_size):
+            conn = self._connect()
+            with self._cond:
+                self._size += 1
+                self._idle.append((conn, time.monotonic()))
+
+    def _connect(self):
+        """Open a new physical connection, retrying with backoff on failure"""
+        attempt = 0
+        while True:
+            try:
+                conn = psycopg2.connect(self.dsn)
+                with self._cond:
+                    self._stats['connections_created'] += 1
+                return conn
+            except psycopg2.OperationalError:
+                with self._cond:
+                    self._stats['connect_failures'] += 1
+                attempt += 1
+                if attempt > self.connect_retries:
+                    raise
+                time.sleep(self.retry_delay * (2 ** (attempt - 1)))
+
+    def _is_healthy(self, conn, last_used: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats['connections_discarded'] += 1
+            self._cond.notify()
+
+    def getconn(self) -> PooledConnection:
+        """Check out a healthy connection, waiting if the pool is exhausted"""
+        checkout_start = time.perf_counter()
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        wait_start = None
+
+        while True:
+            conn = None
+            last_used = 0.0
+            create = False
+
+            with self._cond:
+                if self._closed:
+                    raise psycopg2.InterfaceError("connection pool is closed")
+
+                while not self._idle and self._size >= self.max_size:
+                    if not waited:
+                        waited = True
+                        wait_start = time.monotonic()
+                        self._stats['waits'] += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(f"No database connection available within {self.timeout}s")
+                    self._cond.wait(remaining)
+                    if self._closed:
+                        raise psycopg2.InterfaceError("connection pool is closed")
+
+                if waited:
+                    waited_for = time.monotonic() - wait_start
+                    self._stats['wait_time_total'] += waited_for
+                    self._stats['wait_time_max'] = max(self._stats['wait_time_max'], waited_for)
+                    waited = False
+
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                else:
+                    create = True
+                    self._size += 1
+                self._in_use += 1
+
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(conn, last_used):
+                with self._cond:
+                    self._in_use -= 1
+                    self._stats['health_check_failures'] += 1
+                self._discard(conn)
+                continue
+
+            with self._cond:
+                self._stats['checkouts'] += 1
+                self._stats['max_in_use'] = max(self._stats['max_in_use'], self._in_use)
+            if self.query_stats is not None:
+                self.query_stats.record_connection_acquire(time.perf_counter() - checkout_start)
+            return PooledConnection(self, conn)
+
+    def putconn(self, conn):
+        """Return a raw connection to the pool, rolling back any open transaction"""
+        if isinstance(conn, PooledConnection):
+            conn.close()
+            return
+
+        reusable = not conn.closed
+        if reusable:
+            try:
+                status = conn.get_transaction_status()
+                if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                    reusable = False
+                elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                reusable = False
+
+        with self._cond:
+            self._in_use -= 1
+            if reusable and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+                return
+
+        self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager yielding a pooled connection that is returned on exit"""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict:
+        """Snapshot of pool counters for sizing and monitoring"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+            })
+        return stats
+
+    def closeall(self):
+        """Close idle connections and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
@@ -1,127 +1,284 @@
 import psycopg2
-from psycopg2.extras import RealDictCursor
+import psycopg2.errors
+from psycopg2.extras import RealDictCursor, execute_values, register_default_json
 import os
+import json
+import re
+from decimal import Decimal
 from datetime import datetime
 import threading
+import time
+from contextlib import contextmanager, nullcontext
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
+from connection_pool import ConnectionPool
+from migrations import apply_migrations, LATEST_SCHEMA_VERSION
+from catalog_cache import CatalogCache, CATALOG_CHANNEL
+from rollups import apply_order_rollups, rebuild_rollups
+from instrumentation import QueryStats, instrument_methods
 
 load_dotenv()
 
+# Advisory lock key guarding schema creation across processes
+SCHEMA_LOCK_KEY = 7250001
+
+# Product columns returned to callers (excludes the internal search_vector)
+PRODUCT_COLUMNS = "p.id, p.name, p.description, p.price, p.stock_quantity, p.category, p.sku, p.created_at, p.updated_at"
+
+# Sort keys accepted by DatabaseManager.search_products
+PRODUCT_SORT_OPTIONS = {
+    'relevance': 'rank DESC, p.name, p.id',
+    'name': 'p.name, p.id',
+    'price_asc': 'p.price ASC, p.id',
+    'price_desc': 'p.price DESC, p.id',
+    'stock': 'p.stock_quantity DESC, p.id'
+}
+
+# Sort keys accepted by DatabaseManager.query_orders (id breaks ties deterministically)
+ORDER_SORT_OPTIONS = {
+    'recent': 'o.created_at DESC, o.id DESC',
+    'oldest': 'o.created_at ASC, o.id ASC',
+    'amount_desc': 'o.total_amount DESC, o.id DESC',
+    'amount_asc': 'o.total_amount ASC, o.id ASC'
+}
+
+# Ledger entry types written to inventory_transactions
+INVENTORY_TRANSACTION_TYPES = ['initial_stock', 'restock', 'manual_update', 'reserve', 'release', 'sale', 'return']
+
+# Process-wide instance handed out by DatabaseManager.shared()
+_shared_manager = None
+_shared_manager_lock = threading.Lock()
+
+@instrument_methods(exclude=('get_connection', 'connection', 'get_pool_stats', 'get_query_stats', 'close', 'write_lock'))
 class DatabaseManager:
     def __init__(self):
         self.database_url = os.getenv('DATABASE_URL')
         self.lock = threading.Lock()
-        self.init_database()
-        self.create_demo_data()
+        # Per-method / per-statement timings; DB_INSTRUMENTATION=0 turns them off
+        self.query_stats = None
+        if os.getenv('DB_INSTRUMENTATION', '1') == '1':
+            self.query_stats = QueryStats(slow_query_ms=float(os.getenv('DB_SLOW_QUERY_MS', '500')))
+        # 'row' relies on SELECT ... FOR UPDATE / guarded UPDATEs inside each
+        # transaction; 'process' additionally serializes writes on self.lock
+        self.concurrency_mode = os.getenv('DB_CONCURRENCY_MODE', 'row')
+        if self.concurrency_mode not in ('row', 'process'):
+            raise ValueError(f"Unknown DB_CONCURRENCY_MODE: {self.concurrency_mode}")
+        self.pool = ConnectionPool(
+            self.database_url,
+            min_size=int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+            max_size=int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            timeout=float(os.getenv('DB_POOL_TIMEOUT', '30')),
+            health_check_interval=float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', '30')),
+            query_stats=self.query_stats
+        )
+        if self.query_stats is not None:
+            self.query_stats.gauges = self.pool.stats
+            if os.getenv('DB_METRICS_FILE'):
+                self.query_stats.start_file_exporter(os.getenv('DB_METRICS_FILE'))
+            if os.getenv('DB_METRICS_PORT'):
+                # Loopback only unless DB_METRICS_HOST opts in to a wider bind
+                self.query_stats.start_http_exporter(
+                    int(os.getenv('DB_METRICS_PORT')), host=os.getenv('DB_METRICS_HOST', '127.0.0.1')
+                )
+        self.catalog_cache = CatalogCache(ttl=float(os.getenv('CATALOG_CACHE_TTL', '30')))
+        # Columnar view of the cached catalog for the shop (built on first browse)
+        self._catalog_index = None
+        self._catalog_index_lock = threading.Lock()
+        # Cross-process invalidation via LISTEN/NOTIFY is opt-in
+        self.catalog_notify = os.getenv('CATALOG_CACHE_NOTIFY', '0') == '1'
+        # One version lookup when the schema is current; DDL only when it is behind
+        self.schema_migrated = self.ensure_schema()
+        # Demo catalog only on request (SEED_DEMO_DATA=1), never on a normal boot
+        if os.getenv('SEED_DEMO_DATA', '0') == '1':
+            self.create_demo_data()
+        if self.catalog_notify and self.catalog_cache.enabled:
+            self.catalog_cache.start_listener(self.database_url)
+    
+    @classmethod
+    def shared(cls) -> 'DatabaseManager':
+        """The process-wide manager: one pool, one catalog cache, one schema check per process"""
+        global _shared_manager
+        with _shared_manager_lock:
+            if _shared_manager is None:
+                _shared_manager = cls()
+            return _shared_manager
     
     def get_connection(self):
-        conn = psycopg2.connect(self.database_url)
-        return conn
+        """Check out a pooled connection; conn.close() returns it to the pool.
+        
+        Prefer connection(), which also returns it when the caller raises.
+        """
+        return self.pool.getconn()
     
-    def init_database(self):
+    def connection(self):
+        """Context manager variant of get_connection"""
+        return self.pool.connection()
+    
+    def get_pool_stats(self) -> Dict:
+        """Pool statistics (waits, checkouts, in-use, ...) for sizing the pool"""
+        return self.pool.stats()
+    
+    def get_query_stats(self) -> Optional[Dict]:
+        """Snapshot of the instrumentation counters, or None when disabled"""
+        return self.query_stats.snapshot() if self.query_stats is not None else None
+    
+    def close(self):
+        self.catalog_cache.stop_listener()
+        self.pool.closeall()
+    
+    def write_lock(self):
+        """Process-wide write lock in 'process' mode, a no-op in 'row' mode"""
+        if self.concurrency_mode == 'process':
+            return self._timed_lock()
+        return nullcontext()
+    
+    @contextmanager
+    def _timed_lock(self):
+        start = time.perf_counter()
         with self.lock:
-            conn = self.get_connection()
+            if self.query_stats is not None:
+                self.query_stats.record_lock_wait(time.perf_counter() - start)
+            yield
+    
+    def _lock_cart(self, cursor, username: str):
+        """Serialize writers of one user's cart for the rest of the transaction"""
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", ('cart:' + username,))
+    
+    def _notify_catalog_change(self, cursor):
+        """Tell other processes to drop their catalog cache once this transaction commits"""
+        if self.catalog_notify:
+            cursor.execute(f"NOTIFY {CATALOG_CHANNEL}")
+    
+    def get_schema_version(self) -> int:
+        """Highest applied migration, 0 when the schema was never created"""
+        with self.connection() as conn:
             cursor = conn.cursor()
-            
-            # Users table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id SERIAL PRIMARY KEY,
-                    username VARCHAR(255) UNIQUE NOT NULL,
-                    password_hash VARCHAR(255) NOT NULL,
-                    role VARCHAR(50) NOT NULL DEFAULT 'customer',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Products table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS products (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL,
-                    description TEXT,
-                    price DECIMAL(10, 2) NOT NULL,
-                    stock_quantity INTEGER NOT NULL DEFAULT 0,
-                    category VARCHAR(100),
-                    sku VARCHAR(100),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Orders table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS orders (
-                    id SERIAL PRIMARY KEY,
-                    username VARCHAR(255) NOT NULL,
-                    status VARCHAR(50) NOT NULL DEFAULT 'placed',
-                    total_amount DECIMAL(10, 2) NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Order items table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS order_items (
-                    id SERIAL PRIMARY KEY,
-                    order_id INTEGER NOT NULL,
-                    product_id INTEGER NOT NULL,
-                    product_name VARCHAR(255) NOT NULL,
-                    quantity INTEGER NOT NULL,
-                    unit_price DECIMAL(10, 2) NOT NULL,
-                    FOREIGN KEY (order_id) REFERENCES orders (id),
-                    FOREIGN KEY (product_id) REFERENCES products (id)
-                )
-            """)
-            
-            # Inventory transactions table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS inventory_transactions (
-                    id SERIAL PRIMARY KEY,
-                    product_id INTEGER NOT NULL,
-                    transaction_type VARCHAR(50) NOT NULL,
-                    quantity_change INTEGER NOT NULL,
-                    reference_id VARCHAR(100),
-                    notes TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (product_id) REFERENCES products (id)
-                )
-            """)
-            
-            # Shopping cart table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS shopping_cart (
-                    id SERIAL PRIMARY KEY,
-                    username VARCHAR(255) NOT NULL,
-                    product_id INTEGER NOT NULL,
-                    quantity INTEGER NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (product_id) REFERENCES products (id)
-                )
-            """)
-            
-            # Reserved inventory table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS reserved_inventory (
-                    id SERIAL PRIMARY KEY,
-                    product_id INTEGER NOT NULL,
-                    username VARCHAR(255) NOT NULL,
-                    quantity INTEGER NOT NULL,
-                    expires_at TIMESTAMP NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (product_id) REFERENCES products (id)
-                )
-            """)
-            
-            conn.commit()
-            conn.close()
+            try:
+                cursor.execute("SELECT MAX(version) FROM schema_migrations")
+                return cursor.fetchone()[0] or 0
+            except psycopg2.errors.UndefinedTable:
+                conn.rollback()
+                return 0
+    
+    def ensure_schema(self) -> bool:
+        """Run init_database only if the schema is behind LATEST_SCHEMA_VERSION. Returns True if it ran."""
+        if self.get_schema_version() >= LATEST_SCHEMA_VERSION:
+            return False
+        self.init_database()
+        return True
+    
+    def init_database(self):
+        with self.write_lock():
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                
+                # Keep concurrent replicas from racing on CREATE TABLE IF NOT EXISTS
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", (SCHEMA_LOCK_KEY,))
+                
+                # Users table
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS users (
+                        id SERIAL PRIMARY KEY,
+                        username VARCHAR(255) UNIQUE NOT NULL,
+                        password_hash VARCHAR(255) NOT NULL,
+                        role VARCHAR(50) NOT NULL DEFAULT 'customer',
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                
+                # Products table
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS products (
+                        id SERIAL PRIMARY KEY,
+                        name VARCHAR(255) NOT NULL,
+                        description TEXT,
+                        price DECIMAL(10, 2) NOT NULL,
+                        stock_quantity INTEGER NOT NULL DEFAULT 0,
+                        category VARCHAR(100),
+                        sku VARCHAR(100),
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                
+                # Orders table
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS orders (
+                        id SERIAL PRIMARY KEY,
+                        username VARCHAR(255) NOT NULL,
+                        status VARCHAR(50) NOT NULL DEFAULT 'placed',
+                        total_amount DECIMAL(10, 2) NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                
+                # Order items table
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS order_items (
+                        id SERIAL PRIMARY KEY,
+                        order_id INTEGER NOT NULL,
+                        product_id INTEGER NOT NULL,
+                        product_name VARCHAR(255) NOT NULL,
+                        quantity INTEGER NOT NULL,
+                        unit_price DECIMAL(10, 2) NOT NULL,
+                        FOREIGN KEY (order_id) REFERENCES orders (id),
+                        FOREIGN KEY (product_id) REFERENCES products (id)
+                    )
+                """)
+                
+                # Inventory transactions table
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS inventory_transactions (
+                        id SERIAL PRIMARY KEY,
+                        product_id INTEGER NOT NULL,
+                        transaction_type VARCHAR(50) NOT NULL,
+                        quantity_change INTEGER NOT NULL,
+                        reference_id VARCHAR(100),
+                        notes TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (product_id) REFERENCES products (id)
+                    )
+                """)
+                
+                # Shopping cart table
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS shopping_cart (
+                        id SERIAL PRIMARY KEY,
+                        username VARCHAR(255) NOT NULL,
+                        product_id INTEGER NOT NULL,
+                        quantity INTEGER NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (product_id) REFERENCES products (id)
+                    )
+                """)
+                
+                # Reserved inventory table
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS reserved_inventory (
+                        id SERIAL PRIMARY KEY,
+                        product_id INTEGER NOT NULL,
+                        username VARCHAR(255) NOT NULL,
+                        quantity INTEGER NOT NULL,
+                        expires_at TIMESTAMP NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (product_id) REFERENCES products (id)
+                    )
+                """)
+                
+                # Indexes and constraints added after the base schema
+                apply_migrations(cursor)
+                
+                conn.commit()
     
     def create_demo_data(self):
         """Create demo data if products table is empty"""
-        products = self.get_all_products()
-        if not products:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM products)")
+            has_products = cursor.fetchone()[0]
+        
+        if not has_products:
             demo_products = [
                 ("Basketball", "Professional basketball", 29.99, 50, "Sports", "SPT-BB-001"),
                 ("Soccer Ball", "FIFA approved soccer ball", 24.99, 30, "Sports", "SPT-SB-002"),
@@ -140,33 +297,46 @@ class DatabaseManager:
     
     # User management
     def create_user(self, username: str, password_hash: str, role: str = 'customer') -> bool:
-        try:
-            with self.lock:
-                conn = self.get_connection()
+        """Insert a user in one statement; False if the username is already taken"""
+        with self.write_lock():
+            with self.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
-                    "INSERT INTO users (username, password_hash, role) VALUES (%s, %s, %s)",
+                    """
+                    INSERT INTO users (username, password_hash, role) VALUES (%s, %s, %s)
+                    ON CONFLICT (username) DO NOTHING
+                    RETURNING id
+                    """,
                     (username, password_hash, role)
                 )
+                created = cursor.fetchone() is not None
                 conn.commit()
-                conn.close()
-                return True
-        except psycopg2.IntegrityError:
-            return False
+            return created
+    
+    def update_password_hash(self, username: str, old_hash: str, new_hash: str) -> bool:
+        """Replace a password hash, unless it changed since old_hash was read"""
+        with self.write_lock():
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "UPDATE users SET password_hash = %s WHERE username = %s AND password_hash = %s",
+                    (new_hash, username, old_hash)
+                )
+                updated = cursor.rowcount > 0
+                conn.commit()
+            return updated
     
     def get_user(self, username: str) -> Optional[Dict]:
-        conn = self.get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
-        row = cursor.fetchone()
-        conn.close()
+        with self.connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
+            row = cursor.fetchone()
         return dict(row) if row else None
     
     # Product management
     def add_product(self, name: str, description: str, price: float, stock: int, category: str = None, sku: str = None) -> int:
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        try:
+        with self.connection() as conn:
+            cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO products (name, description, price, stock_quantity, category, sku) VALUES (%s, %s, %s, %s, %s, %s) RETURNING id",
                 (name, description, price, stock, category, sku)
@@ -179,117 +349,293 @@ class DatabaseManager:
                 (product_id, 'initial_stock', stock, 'Initial stock')
             )
             
+            self._notify_catalog_change(cursor)
             conn.commit()
+            self.catalog_cache.invalidate()
             return product_id
-        finally:
-            conn.close()
     
     def get_all_products(self) -> List[Dict]:
-        conn = self.get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute("SELECT * FROM products ORDER BY name")
-        rows = cursor.fetchall()
-        conn.close()
+        """All products ordered by name, served from the catalog cache when fresh"""
+        return self.catalog_cache.get(self._load_all_products)
+    
+    def browse_products(self, category: str = None, sort: str = 'name'):
+        """Catalog browsing without a search term, served from the columnar CatalogIndex.
+        
+        sort is one of catalog_index.INDEX_SORT_KEYS. Returns a CatalogSelection:
+        len() is the total count and page(limit, offset) the rows of one page,
+        both from the same catalog snapshot.
+        The index is rebuilt (incrementally) only when the catalog cache reloads.
+        """
+        from catalog_index import CatalogIndex
+        
+        version, products = self.catalog_cache.snapshot(self._load_all_products)
+        with self._catalog_index_lock:
+            index = self._catalog_index
+            if index is None or version is None or index.version != version:
+                index = CatalogIndex.build(products, previous=index, version=version)
+                self._catalog_index = index
+        return index.selection(category, sort)
+    
+    def get_product_categories(self) -> List[str]:
+        """Distinct non-empty product categories, sorted"""
+        return sorted(set(p['category'] for p in self.get_all_products() if p['category']))
+    
+    def _load_all_products(self) -> List[Dict]:
+        with self.connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute(f"SELECT {PRODUCT_COLUMNS} FROM products p ORDER BY p.name")
+            rows = cursor.fetchall()
         return [dict(row) for row in rows]
     
+    def _search_tsquery(self, query: str) -> Optional[str]:
+        """Turn free text into a prefix tsquery ('bask & bal' -> 'bask:* & bal:*')"""
+        terms = re.findall(r'\w+', query.lower())
+        if not terms:
+            return None
+        return ' & '.join(f"{term}:*" for term in terms)
+    
+    def _product_search_filters(self, query: str = None, category: str = None, substring: bool = False) -> tuple:
+        """WHERE clause for product search: prefix full-text terms, or with substring=True
+        (or a query without word characters) a case-insensitive substring match"""
+        conditions = []
+        params = []
+        query = query.strip() if query else None
+        tsquery = self._search_tsquery(query) if query and not substring else None
+        if tsquery:
+            conditions.append("p.search_vector @@ to_tsquery('simple', %s)")
+            params.append(tsquery)
+        elif query:
+            pattern = '%' + re.sub(r'([\\%_])', r'\\\1', query) + '%'
+            conditions.append("(p.name ILIKE %s OR p.description ILIKE %s)")
+            params.extend([pattern, pattern])
+        if category:
+            conditions.append("p.category = %s")
+            params.append(category)
+        
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where_clause, params, tsquery
+    
+    def _select_products(self, cursor, query: str, category: str, sort: str, limit: int, offset: int,
+                         substring: bool = False) -> tuple:
+        """One page of search_products results. Returns (rows, tsquery)."""
+        where_clause, params, tsquery = self._product_search_filters(query, category, substring)
+        if tsquery:
+            rank_column = "ts_rank_cd(p.search_vector, to_tsquery('simple', %s)) AS rank"
+            params = [tsquery] + params
+        else:
+            rank_column = "0 AS rank"
+        
+        cursor.execute(f"""
+            SELECT {PRODUCT_COLUMNS}, {rank_column}
+            FROM products p
+            {where_clause}
+            ORDER BY {PRODUCT_SORT_OPTIONS[sort]}
+            LIMIT %s OFFSET %s
+        """, params + [limit, offset])
+        return [dict(row) for row in cursor.fetchall()], tsquery
+    
+    def _count_products(self, cursor, query: str, category: str, substring: bool = False) -> tuple:
+        """Number of products matching the search filters. Returns (count, tsquery)."""
+        where_clause, params, tsquery = self._product_search_filters(query, category, substring)
+        cursor.execute(f"SELECT COUNT(*) AS count FROM products p {where_clause}", params)
+        return cursor.fetchone()['count'], tsquery
+    
+    def search_products(self, query: str = None, category: str = None, sort: str = 'relevance', limit: int = 50, offset: int = 0) -> List[Dict]:
+        """Full-text product search over name and description, ranked by relevance.
+        
+        Matching uses the GIN-indexed search_vector with prefix terms, so partial
+        words typed into the search box match. Prefix terms only match the start
+        of a word; when they match nothing at all the query is retried as a
+        case-insensitive substring ("ball" finds "Basketball"), unranked. Without
+        a query, sort 'relevance' falls back to name order.
+        """
+        if sort not in PRODUCT_SORT_OPTIONS:
+            raise ValueError(f"Unknown product sort: {sort}")
+        
+        with self.connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            rows, tsquery = self._select_products(cursor, query, category, sort, limit, offset)
+            # An empty first page means no full-text match; past it, check before falling back
+            if not rows and tsquery and (offset == 0 or self._count_products(cursor, query, category)[0] == 0):
+                rows, _ = self._select_products(cursor, query, category, sort, limit, offset, substring=True)
+        return rows
+    
+    def count_products(self, query: str = None, category: str = None) -> int:
+        """Number of products matching the same filters as search_products"""
+        with self.connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            count, tsquery = self._count_products(cursor, query, category)
+            if count == 0 and tsquery:
+                count, _ = self._count_products(cursor, query, category, substring=True)
+        return count
+    
     def get_product(self, product_id: int) -> Optional[Dict]:
-        conn = self.get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute("SELECT * FROM products WHERE id = %s", (product_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with self.connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute(f"SELECT {PRODUCT_COLUMNS} FROM products p WHERE p.id = %s", (product_id,))
+            row = cursor.fetchone()
         return dict(row) if row else None
     
     def update_product_stock(self, product_id: int, new_stock: int, transaction_type: str = 'manual_update', notes: str = None) -> bool:
-        with self.lock:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # Get current stock
-            cursor.execute("SELECT stock_quantity FROM products WHERE id = %s", (product_id,))
-            result = cursor.fetchone()
-            if not result:
-                conn.close()
-                return False
-            
-            old_stock = result[0]
-            quantity_change = new_stock - old_stock
-            
-            # Update stock
-            cursor.execute(
-                "UPDATE products SET stock_quantity = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
-                (new_stock, product_id)
-            )
-            
-            # Log transaction (same cursor to ensure atomicity)
-            self.log_inventory_transaction(product_id, transaction_type, quantity_change, notes, cursor=cursor)
-            
-            conn.commit()
-            conn.close()
+        with self.write_lock():
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                
+                # Get current stock (row lock keeps the logged delta consistent)
+                cursor.execute("SELECT stock_quantity FROM products WHERE id = %s FOR UPDATE", (product_id,))
+                result = cursor.fetchone()
+                if not result:
+                    return False
+                
+                old_stock = result[0]
+                quantity_change = new_stock - old_stock
+                
+                # Update stock
+                cursor.execute(
+                    "UPDATE products SET stock_quantity = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                    (new_stock, product_id)
+                )
+                
+                # Log transaction (same cursor to ensure atomicity)
+                self.log_inventory_transaction(product_id, transaction_type, quantity_change, notes, cursor=cursor)
+                
+                self._notify_catalog_change(cursor)
+                conn.commit()
+                self.catalog_cache.invalidate()
             return True
     
     def reserve_inventory(self, product_id: int, username: str, quantity: int) -> bool:
         """Reserve inventory for a user temporarily"""
-        with self.lock:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # Check available stock
-            cursor.execute("SELECT stock_quantity FROM products WHERE id = %s", (product_id,))
-            result = cursor.fetchone()
-            if not result or result[0] < quantity:
-                conn.close()
-                return False
-            
-            # Create reservation (expires in 30 minutes)
-            cursor.execute(
-                "INSERT INTO reserved_inventory (product_id, username, quantity, expires_at) VALUES (%s, %s, %s, CURRENT_TIMESTAMP + INTERVAL '30 minutes')",
-                (product_id, username, quantity)
-            )
-            
-            # Update available stock
-            new_stock = result[0] - quantity
-            cursor.execute(
-                "UPDATE products SET stock_quantity = %s WHERE id = %s",
-                (new_stock, product_id)
-            )
-            
-            # Log transaction (same cursor to ensure atomicity)
-            self.log_inventory_transaction(product_id, 'reserve', -quantity, f'Reserved for {username}', cursor=cursor)
-            
-            conn.commit()
-            conn.close()
+        with self.write_lock():
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                
+                # Check and decrement available stock in one guarded statement
+                cursor.execute(
+                    "UPDATE products SET stock_quantity = stock_quantity - %s WHERE id = %s AND stock_quantity >= %s",
+                    (quantity, product_id, quantity)
+                )
+                if cursor.rowcount == 0:
+                    conn.rollback()
+                    return False
+                
+                # Create reservation (expires in 30 minutes)
+                cursor.execute(
+                    "INSERT INTO reserved_inventory (product_id, username, quantity, expires_at) VALUES (%s, %s, %s, CURRENT_TIMESTAMP + INTERVAL '30 minutes')",
+                    (product_id, username, quantity)
+                )
+                
+                # Log transaction (same cursor to ensure atomicity)
+                self.log_inventory_transaction(product_id, 'reserve', -quantity, f'Reserved for {username}', cursor=cursor)
+                
+                self._notify_catalog_change(cursor)
+                conn.commit()
+                self.catalog_cache.invalidate()
             return True
     
     def release_reservation(self, product_id: int, username: str, quantity: int) -> bool:
         """Release reserved inventory back to available stock"""
-        with self.lock:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # Remove reservation
-            cursor.execute(
-                "DELETE FROM reserved_inventory WHERE product_id = %s AND username = %s AND quantity = %s",
-                (product_id, username, quantity)
-            )
-            
-            # Update available stock
-            cursor.execute("SELECT stock_quantity FROM products WHERE id = %s", (product_id,))
-            result = cursor.fetchone()
-            if result:
-                new_stock = result[0] + quantity
+        with self.write_lock():
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                
+                # Remove one matching reservation; concurrent releases of the same
+                # reservation skip the locked row instead of restocking twice
+                cursor.execute("""
+                    DELETE FROM reserved_inventory
+                    WHERE id = (
+                        SELECT id FROM reserved_inventory
+                        WHERE product_id = %s AND username = %s AND quantity = %s
+                        ORDER BY created_at
+                        LIMIT 1
+                        FOR UPDATE SKIP LOCKED
+                    )
+                """, (product_id, username, quantity))
+                if cursor.rowcount == 0:
+                    conn.rollback()
+                    return False
+                
+                # Update available stock
                 cursor.execute(
-                    "UPDATE products SET stock_quantity = %s WHERE id = %s",
-                    (new_stock, product_id)
+                    "UPDATE products SET stock_quantity = stock_quantity + %s WHERE id = %s",
+                    (quantity, product_id)
                 )
+                if cursor.rowcount > 0:
+                    # Log transaction (same cursor to ensure atomicity)
+                    self.log_inventory_transaction(product_id, 'release', quantity, f'Released from {username}', cursor=cursor)
                 
-                # Log transaction (same cursor to ensure atomicity)
-                self.log_inventory_transaction(product_id, 'release', quantity, f'Released from {username}', cursor=cursor)
-            
-            conn.commit()
-            conn.close()
+                self._notify_catalog_change(cursor)
+                conn.commit()
+                self.catalog_cache.invalidate()
             return True
     
+    def release_expired_reservations(self, batch_size: int = 500, max_batches: int = None) -> Dict:
+        """Return stock held by expired reservations, in batches.
+        
+        Each batch deletes up to batch_size expired rows (oldest first, via the
+        expires_at index), restocks the products and writes one 'release'
+        transaction per reservation in a single statement. Rows locked by a
+        concurrent release are skipped. Returns totals for the run.
+        """
+        totals = {'reservations': 0, 'units': 0, 'batches': 0}
+        
+        while max_batches is None or totals['batches'] < max_batches:
+            with self.write_lock():
+                with self.connection() as conn:
+                    cursor = conn.cursor(cursor_factory=RealDictCursor)
+                    
+                    try:
+                        cursor.execute("""
+                            WITH expired AS (
+                                DELETE FROM reserved_inventory
+                                WHERE id IN (
+                                    SELECT id FROM reserved_inventory
+                                    WHERE expires_at < CURRENT_TIMESTAMP
+                                    ORDER BY expires_at
+                                    LIMIT %s
+                                    FOR UPDATE SKIP LOCKED
+                                )
+                                RETURNING product_id, username, quantity
+                            ),
+                            per_product AS (
+                                SELECT product_id, SUM(quantity) AS quantity
+                                FROM expired
+                                GROUP BY product_id
+                            ),
+                            restocked AS (
+                                UPDATE products p
+                                SET stock_quantity = p.stock_quantity + per_product.quantity, updated_at = CURRENT_TIMESTAMP
+                                FROM per_product
+                                WHERE p.id = per_product.product_id
+                            ),
+                            ledger AS (
+                                INSERT INTO inventory_transactions (product_id, transaction_type, quantity_change, notes)
+                                SELECT product_id, 'release', quantity, 'Expired reservation for ' || username
+                                FROM expired
+                            )
+                            SELECT COUNT(*) AS reservations, COALESCE(SUM(quantity), 0) AS units FROM expired
+                        """, (batch_size,))
+                        result = cursor.fetchone()
+                        
+                        if result['reservations']:
+                            self._notify_catalog_change(cursor)
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        raise
+            
+            if result['reservations']:
+                self.catalog_cache.invalidate()
+            
+            totals['batches'] += 1
+            totals['reservations'] += result['reservations']
+            totals['units'] += int(result['units'])
+            
+            if result['reservations'] < batch_size:
+                break
+        
+        return totals
+    
     def log_inventory_transaction(self, product_id: int, transaction_type: str, quantity_change: int, notes: str = None, reference_id: str = None, cursor=None):
         """Log inventory transaction - if cursor provided, uses it (for transaction safety), otherwise creates new connection"""
         if cursor:
@@ -300,78 +646,63 @@ class DatabaseManager:
             )
         else:
             # Standalone transaction
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO inventory_transactions (product_id, transaction_type, quantity_change, reference_id, notes) VALUES (%s, %s, %s, %s, %s)",
-                (product_id, transaction_type, quantity_change, reference_id, notes)
-            )
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "INSERT INTO inventory_transactions (product_id, transaction_type, quantity_change, reference_id, notes) VALUES (%s, %s, %s, %s, %s)",
+                    (product_id, transaction_type, quantity_change, reference_id, notes)
+                )
+                conn.commit()
     
     # Shopping Cart
     def add_to_cart(self, username: str, product_id: int, quantity: int) -> bool:
-        with self.lock:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # Check if item already in cart
-            cursor.execute(
-                "SELECT quantity FROM shopping_cart WHERE username = %s AND product_id = %s",
-                (username, product_id)
-            )
-            result = cursor.fetchone()
-            
-            if result:
-                # Update quantity
-                new_quantity = result[0] + quantity
-                cursor.execute(
-                    "UPDATE shopping_cart SET quantity = %s WHERE username = %s AND product_id = %s",
-                    (new_quantity, username, product_id)
-                )
-            else:
-                # Add new item
+        with self.write_lock():
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                
+                self._lock_cart(cursor, username)
+                
+                # Add new item, or increment quantity if already in cart
                 cursor.execute(
-                    "INSERT INTO shopping_cart (username, product_id, quantity) VALUES (%s, %s, %s)",
+                    """
+                    INSERT INTO shopping_cart (username, product_id, quantity) VALUES (%s, %s, %s)
+                    ON CONFLICT (username, product_id) DO UPDATE SET quantity = shopping_cart.quantity + EXCLUDED.quantity
+                    """,
                     (username, product_id, quantity)
                 )
-            
-            conn.commit()
-            conn.close()
+                
+                conn.commit()
             return True
     
     def get_cart_items(self, username: str) -> List[Dict]:
-        conn = self.get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute("""
-            SELECT c.*, p.name, p.price, p.stock_quantity
-            FROM shopping_cart c
-            JOIN products p ON c.product_id = p.id
-            WHERE c.username = %s
-        """, (username,))
-        rows = cursor.fetchall()
-        conn.close()
+        with self.connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("""
+                SELECT c.*, p.name, p.price, p.stock_quantity
+                FROM shopping_cart c
+                JOIN products p ON c.product_id = p.id
+                WHERE c.username = %s
+            """, (username,))
+            rows = cursor.fetchall()
         return [dict(row) for row in rows]
     
     def remove_from_cart(self, username: str, product_id: int) -> bool:
-        with self.lock:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "DELETE FROM shopping_cart WHERE username = %s AND product_id = %s",
-                (username, product_id)
-            )
-            conn.commit()
-            conn.close()
+        with self.write_lock():
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "DELETE FROM shopping_cart WHERE username = %s AND product_id = %s",
+                    (username, product_id)
+                )
+                conn.commit()
             return True
     
     def clear_cart(self, username: str) -> bool:
-        with self.lock:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM shopping_cart WHERE username = %s", (username,))
-            conn.commit()
-            conn.close()
+        with self.write_lock():
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM shopping_cart WHERE username = %s", (username,))
+                conn.commit()
             return True
     
     # Order management
@@ -379,167 +710,488 @@ class DatabaseManager:
         if not cart_items:
             return None
         
-        with self.lock:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            try:
-                # Calculate total
-                total_amount = sum(item['quantity'] * float(item['price']) for item in cart_items)
-                
-                # Create order
-                cursor.execute(
-                    "INSERT INTO orders (username, total_amount) VALUES (%s, %s) RETURNING id",
-                    (username, total_amount)
-                )
-                order_id = cursor.fetchone()[0]
+        with self.write_lock():
+            with self.connection() as conn:
+                cursor = conn.cursor()
                 
-                # Add order items and update inventory
-                for item in cart_items:
+                try:
+                    # Prevent a double-submitted checkout from ordering the same cart twice
+                    self._lock_cart(cursor, username)
+                    
+                    # Calculate total
+                    total_amount = sum(item['quantity'] * float(item['price']) for item in cart_items)
+                    
+                    # Create order
                     cursor.execute(
-                        "INSERT INTO order_items (order_id, product_id, product_name, quantity, unit_price) VALUES (%s, %s, %s, %s, %s)",
-                        (order_id, item['product_id'], item['name'], item['quantity'], item['price'])
+                        "INSERT INTO orders (username, total_amount) VALUES (%s, %s) RETURNING id",
+                        (username, total_amount)
                     )
+                    order_id = cursor.fetchone()[0]
                     
-                    # Log inventory transaction for sale (same cursor to ensure atomicity)
-                    self.log_inventory_transaction(
-                        item['product_id'], 
-                        'sale', 
-                        -item['quantity'], 
-                        f'Order #{order_id}',
-                        str(order_id),
-                        cursor=cursor
+                    # Add order items and log the sale, one batched statement each
+                    execute_values(
+                        cursor,
+                        "INSERT INTO order_items (order_id, product_id, product_name, quantity, unit_price) VALUES %s",
+                        [(order_id, item['product_id'], item['name'], item['quantity'], item['price']) for item in cart_items]
                     )
+                    execute_values(
+                        cursor,
+                        "INSERT INTO inventory_transactions (product_id, transaction_type, quantity_change, reference_id, notes) VALUES %s",
+                        [(item['product_id'], 'sale', -item['quantity'], str(order_id), f'Order #{order_id}') for item in cart_items]
+                    )
+                    apply_order_rollups(cursor, [order_id], 1)
+                    
+                    # The reservations made for this cart are now fulfilled by the order
+                    cursor.execute(
+                        "DELETE FROM reserved_inventory WHERE username = %s AND product_id = ANY(%s)",
+                        (username, [item['product_id'] for item in cart_items])
+                    )
+                    
+                    # Clear cart
+                    cursor.execute("DELETE FROM shopping_cart WHERE username = %s", (username,))
+                    
+                    self._notify_catalog_change(cursor)
+                    conn.commit()
+                    self.catalog_cache.invalidate()
+                    return order_id
+                    
+                except Exception as e:
+                    conn.rollback()
+                    return None
+    
+    def checkout(self, username: str) -> tuple:
+        """Turn the user's cart into an order in one transaction.
+        
+        Stock is validated under row locks and then decremented, the order
+        header, order items, sale transactions and cart removal are written by a
+        single set-based statement, so the number of round trips does not depend
+        on cart size. Returns (order_id, stock_issues); on any shortage nothing
+        is written and order_id is None.
+        """
+        with self.write_lock():
+            with self.connection() as conn:
+                cursor = conn.cursor(cursor_factory=RealDictCursor)
                 
-                # Clear cart
-                cursor.execute("DELETE FROM shopping_cart WHERE username = %s", (username,))
-                
-                conn.commit()
-                conn.close()
-                return order_id
-                
-            except Exception as e:
-                conn.rollback()
-                conn.close()
-                return None
+                try:
+                    self._lock_cart(cursor, username)
+                    
+                    # Lock the products in the cart and validate stock
+                    cursor.execute("""
+                        SELECT p.id, p.name, p.stock_quantity, c.quantity
+                        FROM products p
+                        JOIN (
+                            SELECT product_id, SUM(quantity) AS quantity
+                            FROM shopping_cart
+                            WHERE username = %s
+                            GROUP BY product_id
+                        ) c ON c.product_id = p.id
+                        ORDER BY p.id
+                        FOR UPDATE OF p
+                    """, (username,))
+                    lines = cursor.fetchall()
+                    
+                    if not lines:
+                        conn.rollback()
+                        return None, ["Your cart is empty"]
+                    
+                    stock_issues = [
+                        f"{line['name']} - Want {line['quantity']}, Only {line['stock_quantity']} available"
+                        for line in lines if line['quantity'] > line['stock_quantity']
+                    ]
+                    if stock_issues:
+                        conn.rollback()
+                        return None, stock_issues
+                    
+                    # Decrement stock, write order, items and ledger, and clear the cart
+                    cursor.execute("""
+                        WITH cart AS (
+                            SELECT c.product_id, SUM(c.quantity) AS quantity, p.name, p.price
+                            FROM shopping_cart c
+                            JOIN products p ON p.id = c.product_id
+                            WHERE c.username = %(username)s
+                            GROUP BY c.product_id, p.name, p.price
+                        ),
+                        new_order AS (
+                            INSERT INTO orders (username, total_amount)
+                            SELECT %(username)s, SUM(quantity * price) FROM cart
+                            RETURNING id
+                        ),
+                        stock AS (
+                            UPDATE products p
+                            SET stock_quantity = p.stock_quantity - cart.quantity, updated_at = CURRENT_TIMESTAMP
+                            FROM cart
+                            WHERE p.id = cart.product_id
+                        ),
+                        items AS (
+                            INSERT INTO order_items (order_id, product_id, product_name, quantity, unit_price)
+                            SELECT new_order.id, cart.product_id, cart.name, cart.quantity, cart.price
+                            FROM new_order CROSS JOIN cart
+                        ),
+                        ledger AS (
+                            INSERT INTO inventory_transactions (product_id, transaction_type, quantity_change, reference_id, notes)
+                            SELECT cart.product_id, 'sale', -cart.quantity, new_order.id::text, 'Order #' || new_order.id
+                            FROM new_order CROSS JOIN cart
+                        ),
+                        cleared AS (
+                            DELETE FROM shopping_cart WHERE username = %(username)s
+                        )
+                        SELECT id FROM new_order
+                    """, {'username': username})
+                    order_id = cursor.fetchone()['id']
+                    apply_order_rollups(cursor, [order_id], 1)
+                    
+                    self._notify_catalog_change(cursor)
+                    conn.commit()
+                    self.catalog_cache.invalidate()
+                    return order_id, []
+                    
+                except Exception as e:
+                    conn.rollback()
+                    return None, [f"Checkout failed: {str(e)}"]
     
     def get_user_orders(self, username: str) -> List[Dict]:
-        conn = self.get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute(
-            "SELECT * FROM orders WHERE username = %s ORDER BY created_at DESC",
-            (username,)
-        )
-        rows = cursor.fetchall()
-        conn.close()
+        with self.connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute(
+                "SELECT * FROM orders WHERE username = %s ORDER BY created_at DESC",
+                (username,)
+            )
+            rows = cursor.fetchall()
         return [dict(row) for row in rows]
     
     def get_all_orders(self) -> List[Dict]:
-        conn = self.get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute("SELECT * FROM orders ORDER BY created_at DESC")
-        rows = cursor.fetchall()
-        conn.close()
+        with self.connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("SELECT * FROM orders ORDER BY created_at DESC")
+            rows = cursor.fetchall()
         return [dict(row) for row in rows]
     
     def get_order_items(self, order_id: int) -> List[Dict]:
-        conn = self.get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute(
-            "SELECT * FROM order_items WHERE order_id = %s",
-            (order_id,)
-        )
-        rows = cursor.fetchall()
-        conn.close()
+        with self.connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute(
+                "SELECT * FROM order_items WHERE order_id = %s",
+                (order_id,)
+            )
+            rows = cursor.fetchall()
         return [dict(row) for row in rows]
     
-    def update_order_status(self, order_id: int, status: str) -> bool:
-        with self.lock:
-            conn = self.get_connection()
+    def _order_filters(self, order_ids: List[int] = None, statuses: List[str] = None, username: str = None, start_date=None, end_date=None) -> tuple:
+        """Build the WHERE clause shared by the order query methods"""
+        conditions = []
+        params = []
+        if order_ids is not None:
+            conditions.append("o.id = ANY(%s)")
+            params.append(list(order_ids))
+        if statuses:
+            conditions.append("o.status = ANY(%s)")
+            params.append(list(statuses))
+        if username:
+            conditions.append("o.username = %s")
+            params.append(username)
+        if start_date:
+            conditions.append("o.created_at >= %s")
+            params.append(start_date)
+        if end_date:
+            # end_date is inclusive of the whole day
+            conditions.append("o.created_at < %s::date + INTERVAL '1 day'")
+            params.append(end_date)
+        
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where_clause, params
+    
+    def query_orders(self, order_ids: List[int] = None, statuses: List[str] = None, username: str = None,
+                     start_date=None, end_date=None, sort_by: str = 'recent', limit: int = None, offset: int = 0,
+                     include_items: bool = False) -> List[Dict]:
+        """Filtered, sorted and paginated order listing evaluated in Postgres.
+        
+        sort_by is one of ORDER_SORT_OPTIONS. With include_items each order gets
+        an 'items' list shaped like get_order_items() rows, built in the same query.
+        """
+        if order_ids is not None and not order_ids:
+            return []
+        if sort_by not in ORDER_SORT_OPTIONS:
+            raise ValueError(f"Unknown order sort: {sort_by}")
+        
+        where_clause, params = self._order_filters(order_ids, statuses, username, start_date, end_date)
+        
+        items_column = ""
+        if include_items:
+            items_column = """,
+                COALESCE((
+                    SELECT json_agg(json_build_object(
+                        'id', oi.id,
+                        'order_id', oi.order_id,
+                        'product_id', oi.product_id,
+                        'product_name', oi.product_name,
+                        'quantity', oi.quantity,
+                        'unit_price', oi.unit_price
+                    ) ORDER BY oi.id)
+                    FROM order_items oi
+                    WHERE oi.order_id = o.id
+                ), '[]'::json) AS items"""
+        
+        limit_clause = ""
+        if limit is not None:
+            limit_clause = "LIMIT %s OFFSET %s"
+            params.extend([limit, offset])
+        
+        with self.connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            # Keep money columns as Decimal, like the non-aggregated queries return them
+            register_default_json(cursor, loads=lambda value: json.loads(value, parse_float=Decimal))
+            cursor.execute(f"""
+                SELECT o.*{items_column}
+                FROM orders o
+                {where_clause}
+                ORDER BY {ORDER_SORT_OPTIONS[sort_by]}
+                {limit_clause}
+            """, params)
+            rows = cursor.fetchall()
+        return [dict(row) for row in rows]
+    
+    def count_orders(self, statuses: List[str] = None, username: str = None, start_date=None, end_date=None) -> int:
+        """Number of orders matching the same filters as query_orders"""
+        where_clause, params = self._order_filters(None, statuses, username, start_date, end_date)
+        
+        with self.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE orders SET status = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
-                (status, order_id)
-            )
-            affected = cursor.rowcount > 0
-            conn.commit()
-            conn.close()
-            return affected
+            cursor.execute(f"SELECT COUNT(*) FROM orders o {where_clause}", params)
+            count = cursor.fetchone()[0]
+        return count
     
-    def cancel_order(self, order_id: int) -> bool:
-        """Cancel an order and restore inventory"""
-        with self.lock:
-            conn = self.get_connection()
+    def get_order_status_summary(self, username: str = None) -> Dict[str, Dict]:
+        """Order count and total amount per status, optionally for one customer"""
+        where_clause, params = self._order_filters(username=username)
+        
+        with self.connection() as conn:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            try:
-                # Get order items
-                cursor.execute("SELECT * FROM order_items WHERE order_id = %s", (order_id,))
-                items = cursor.fetchall()
+            cursor.execute(f"""
+                SELECT o.status, COUNT(*) AS count, COALESCE(SUM(o.total_amount), 0) AS total_amount
+                FROM orders o
+                {where_clause}
+                GROUP BY o.status
+            """, params)
+            rows = cursor.fetchall()
+        return {row['status']: {'count': row['count'], 'total_amount': row['total_amount']} for row in rows}
+    
+    def get_order_customers(self) -> List[str]:
+        """Distinct usernames that have placed orders"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT DISTINCT username FROM orders ORDER BY username")
+            rows = cursor.fetchall()
+        return [row[0] for row in rows]
+    
+    def get_orders_with_items(self, order_ids: List[int] = None, statuses: List[str] = None, username: str = None, limit: int = None) -> List[Dict]:
+        """Fetch orders, newest first, together with their items in a single query"""
+        return self.query_orders(order_ids=order_ids, statuses=statuses, username=username, limit=limit, include_items=True)
+    
+    def update_order_status(self, order_id: int, status: str) -> bool:
+        with self.write_lock():
+            with self.connection() as conn:
+                cursor = conn.cursor()
                 
-                # Check if order can be cancelled
-                cursor.execute("SELECT status FROM orders WHERE id = %s", (order_id,))
-                result = cursor.fetchone()
-                if not result or result['status'] not in ['placed', 'paid']:
-                    conn.close()
+                # Lock the order so its rollup contribution moves buckets consistently
+                cursor.execute("SELECT id FROM orders WHERE id = %s FOR UPDATE", (order_id,))
+                if not cursor.fetchone():
+                    conn.rollback()
                     return False
                 
-                # Restore inventory
-                for item in items:
-                    cursor.execute(
-                        "UPDATE products SET stock_quantity = stock_quantity + %s WHERE id = %s",
-                        (item['quantity'], item['product_id'])
-                    )
-                    
-                    # Log inventory transaction (same cursor to ensure atomicity)
-                    self.log_inventory_transaction(
-                        item['product_id'],
-                        'return',
-                        item['quantity'],
-                        f'Order #{order_id} cancelled',
-                        str(order_id),
-                        cursor=cursor
-                    )
-                
-                # Update order status
+                apply_order_rollups(cursor, [order_id], -1)
                 cursor.execute(
-                    "UPDATE orders SET status = 'cancelled', updated_at = CURRENT_TIMESTAMP WHERE id = %s",
-                    (order_id,)
+                    "UPDATE orders SET status = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                    (status, order_id)
                 )
+                affected = cursor.rowcount > 0
+                apply_order_rollups(cursor, [order_id], 1)
                 
                 conn.commit()
-                conn.close()
-                return True
+            return affected
+    
+    def update_order_statuses(self, order_ids: List[int], from_status: str, to_status: str) -> List[int]:
+        """Move the given orders from from_status to to_status in one transaction.
+        
+        Orders no longer in from_status (e.g. already handled by someone else)
+        are skipped rather than overwritten. Returns the ids actually updated.
+        Cancelling restores stock per order, so it goes through cancel_order.
+        """
+        if to_status == 'cancelled':
+            raise ValueError("Use cancel_order to cancel orders (it restores inventory)")
+        if not order_ids:
+            return []
+        
+        with self.write_lock():
+            with self.connection() as conn:
+                cursor = conn.cursor()
                 
-            except Exception as e:
-                conn.rollback()
-                conn.close()
-                return False
+                try:
+                    # Lock in id order so overlapping bulk updates can't deadlock
+                    cursor.execute(
+                        "SELECT id FROM orders WHERE id = ANY(%s) AND status = %s ORDER BY id FOR UPDATE",
+                        (list(order_ids), from_status)
+                    )
+                    locked_ids = [row[0] for row in cursor.fetchall()]
+                    if not locked_ids:
+                        conn.rollback()
+                        return []
+                    
+                    apply_order_rollups(cursor, locked_ids, -1)
+                    cursor.execute(
+                        """
+                        UPDATE orders SET status = %s, updated_at = CURRENT_TIMESTAMP
+                        WHERE id = ANY(%s) AND status = %s
+                        RETURNING id
+                        """,
+                        (to_status, locked_ids, from_status)
+                    )
+                    updated_ids = [row[0] for row in cursor.fetchall()]
+                    apply_order_rollups(cursor, updated_ids, 1)
+                    
+                    conn.commit()
+                    return updated_ids
+                except Exception:
+                    conn.rollback()
+                    raise
+    
+    def rebuild_sales_rollups(self):
+        """Recompute the daily sales rollups from scratch (backfill / repair)"""
+        with self.write_lock():
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    rebuild_rollups(cursor)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+    
+    def cancel_order(self, order_id: int) -> bool:
+        """Cancel an order and restore inventory"""
+        with self.write_lock():
+            with self.connection() as conn:
+                cursor = conn.cursor(cursor_factory=RealDictCursor)
+                
+                try:
+                    # Check if order can be cancelled (row lock prevents a double restock)
+                    cursor.execute("SELECT status FROM orders WHERE id = %s FOR UPDATE", (order_id,))
+                    result = cursor.fetchone()
+                    if not result or result['status'] not in ['placed', 'paid']:
+                        conn.rollback()
+                        return False
+                    
+                    # Get order items (product order keeps row locks deadlock-free)
+                    cursor.execute("SELECT * FROM order_items WHERE order_id = %s ORDER BY product_id", (order_id,))
+                    items = cursor.fetchall()
+                    
+                    # Restore inventory
+                    for item in items:
+                        cursor.execute(
+                            "UPDATE products SET stock_quantity = stock_quantity + %s WHERE id = %s",
+                            (item['quantity'], item['product_id'])
+                        )
+                        
+                        # Log inventory transaction (same cursor to ensure atomicity)
+                        self.log_inventory_transaction(
+                            item['product_id'],
+                            'return',
+                            item['quantity'],
+                            f'Order #{order_id} cancelled',
+                            str(order_id),
+                            cursor=cursor
+                        )
+                    
+                    # Update order status
+                    apply_order_rollups(cursor, [order_id], -1)
+                    cursor.execute(
+                        "UPDATE orders SET status = 'cancelled', updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                        (order_id,)
+                    )
+                    apply_order_rollups(cursor, [order_id], 1)
+                    
+                    self._notify_catalog_change(cursor)
+                    conn.commit()
+                    self.catalog_cache.invalidate()
+                    return True
+                    
+                except Exception as e:
+                    conn.rollback()
+                    return False
     
     # Inventory transactions
     def get_inventory_transactions(self, product_id: int = None) -> List[Dict]:
-        conn = self.get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
+        with self.connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            if product_id:
+                cursor.execute("""
+                    SELECT t.*, p.name as product_name
+                    FROM inventory_transactions t
+                    JOIN products p ON t.product_id = p.id
+                    WHERE t.product_id = %s
+                    ORDER BY t.created_at DESC
+                """, (product_id,))
+            else:
+                cursor.execute("""
+                    SELECT t.*, p.name as product_name
+                    FROM inventory_transactions t
+                    JOIN products p ON t.product_id = p.id
+                    ORDER BY t.created_at DESC
+                """)
+            
+            rows = cursor.fetchall()
+        return [dict(row) for row in rows]
+    
+    def _ledger_filters(self, product_id: int = None, transaction_types: List[str] = None, start_date=None, end_date=None) -> tuple:
+        """Conditions shared by the inventory ledger queries, as (conditions, params)"""
+        conditions = []
+        params = []
         if product_id:
-            cursor.execute("""
-                SELECT t.*, p.name as product_name
-                FROM inventory_transactions t
-                JOIN products p ON t.product_id = p.id
-                WHERE t.product_id = %s
-                ORDER BY t.created_at DESC
-            """, (product_id,))
-        else:
-            cursor.execute("""
-                SELECT t.*, p.name as product_name
+            conditions.append("t.product_id = %s")
+            params.append(product_id)
+        if transaction_types:
+            conditions.append("t.transaction_type = ANY(%s)")
+            params.append(list(transaction_types))
+        if start_date:
+            conditions.append("t.created_at >= %s")
+            params.append(start_date)
+        if end_date:
+            # end_date is inclusive of the whole day
+            conditions.append("t.created_at < %s::date + INTERVAL '1 day'")
+            params.append(end_date)
+        return conditions, params
+    
+    def get_inventory_ledger_page(self, product_id: int = None, transaction_types: List[str] = None, start_date=None,
+                                  end_date=None, limit: int = 25, after: tuple = None) -> tuple:
+        """One page of the inventory ledger, newest first, keyset-paginated on (created_at, id).
+        
+        Pass the cursor returned with a page as `after` to get the next (older)
+        one. Returns (rows, next_cursor); next_cursor is None on the last page.
+        Every page is a short index range scan, however long the ledger is.
+        """
+        conditions, params = self._ledger_filters(product_id, transaction_types, start_date, end_date)
+        if after is not None:
+            conditions.append("(t.created_at, t.id) < (%s, %s)")
+            params.extend(after)
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        with self.connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute(f"""
+                SELECT t.*, p.name AS product_name
                 FROM inventory_transactions t
                 JOIN products p ON t.product_id = p.id
-                ORDER BY t.created_at DESC
-            """)
+                {where_clause}
+                ORDER BY t.created_at DESC, t.id DESC
+                LIMIT %s
+            """, params + [limit + 1])
+            rows = [dict(row) for row in cursor.fetchall()]
         
-        rows = cursor.fetchall()
-        conn.close()
-        return [dict(row) for row in rows]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1]['created_at'], rows[-1]['id'])
+        return rows, next_cursor
     
     # CSV Import/Export methods
     def export_products_to_csv(self) -> str:
@@ -561,41 +1213,243 @@ class DatabaseManager:
         
         return output.getvalue()
     
+    def _stream_query_csv(self, query: str, params=None, chunk_bytes: int = 65536, itersize: int = 2000):
+        """Run query on a server-side cursor and yield CSV text chunks.
+        
+        Rows are fetched itersize at a time and flushed once roughly chunk_bytes
+        of CSV has accumulated, so the generator's own memory stays flat
+        regardless of result size (consumers decide what they buffer).
+        The header row comes from the query's column names.
+        """
+        import csv
+        import io
+        import uuid
+        
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor(name=f"csv_export_{uuid.uuid4().hex}")
+            cursor.itersize = itersize
+            cursor.execute(query, params)
+            
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            header_written = False
+            
+            while True:
+                rows = cursor.fetchmany(itersize)
+                if not header_written:
+                    writer.writerow([column.name for column in cursor.description])
+                    header_written = True
+                if not rows:
+                    break
+                
+                writer.writerows(rows)
+                if buffer.tell() >= chunk_bytes:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            
+            if buffer.tell():
+                yield buffer.getvalue()
+            cursor.close()
+        finally:
+            conn.close()
+    
+    def stream_products_csv(self, chunk_bytes: int = 65536):
+        """Yield the product catalog as CSV chunks"""
+        return self._stream_query_csv(
+            "SELECT id, name, description, price, stock_quantity, category, sku FROM products ORDER BY id",
+            chunk_bytes=chunk_bytes
+        )
+    
+    def stream_orders_csv(self, start_date=None, end_date=None, statuses: List[str] = None, chunk_bytes: int = 65536):
+        """Yield orders as CSV chunks, one row per order item (orders without items get one row)"""
+        where_clause, params = self._order_filters(statuses=statuses, start_date=start_date, end_date=end_date)
+        return self._stream_query_csv(f"""
+            SELECT o.id AS order_id, o.username, o.status, o.total_amount, o.created_at, o.updated_at,
+                oi.product_id, oi.product_name, oi.quantity, oi.unit_price
+            FROM orders o
+            LEFT JOIN order_items oi ON oi.order_id = o.id
+            {where_clause}
+            ORDER BY o.id, oi.id
+        """, params, chunk_bytes=chunk_bytes)
+    
+    def stream_inventory_transactions_csv(self, start_date=None, end_date=None, product_id: int = None,
+                                          transaction_type: str = None, chunk_bytes: int = 65536):
+        """Yield the inventory ledger as CSV chunks, oldest first"""
+        conditions, params = self._ledger_filters(
+            product_id, [transaction_type] if transaction_type else None, start_date, end_date
+        )
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        return self._stream_query_csv(f"""
+            SELECT t.id, t.created_at, t.product_id, p.name AS product_name, t.transaction_type,
+                t.quantity_change, t.reference_id, t.notes
+            FROM inventory_transactions t
+            JOIN products p ON t.product_id = p.id
+            {where_clause}
+            ORDER BY t.created_at, t.id
+        """, params, chunk_bytes=chunk_bytes)
+    
     def import_products_from_csv(self, csv_content: str) -> tuple:
         """Import products from CSV content. Returns (success_count, error_messages)"""
+        import io
+        
+        return self.import_products_from_csv_stream(io.StringIO(csv_content))
+    
+    def _parse_import_row(self, row: Dict) -> tuple:
+        """Validate one CSV row, raising ValueError with a readable message"""
+        name = (row.get('name') or '').strip()
+        description = (row.get('description') or '').strip()
+        price = float(row.get('price') or 0)
+        stock = int(row.get('stock_quantity') or 0)
+        category = (row.get('category') or '').strip() or None
+        sku = (row.get('sku') or '').strip() or None
+        
+        if not name or price <= 0:
+            raise ValueError("Invalid name or price")
+        # Reject values the column types would refuse, so one bad row can't abort the COPY
+        if len(name) > 255:
+            raise ValueError("Name longer than 255 characters")
+        if category and len(category) > 100:
+            raise ValueError("Category longer than 100 characters")
+        if sku and len(sku) > 100:
+            raise ValueError("SKU longer than 100 characters")
+        if price >= 10 ** 8:
+            raise ValueError("Price out of range")
+        if not -2 ** 31 <= stock < 2 ** 31:
+            raise ValueError("Stock quantity out of range")
+        
+        return name, description, round(price, 2), stock, category, sku
+    
+    def import_products_from_csv_stream(self, csv_file, chunk_size: int = 5000) -> tuple:
+        """Import products from a CSV file object. Returns (success_count, error_messages)
+        
+        The file (text or binary, e.g. a Streamlit upload) is read incrementally.
+        Valid rows are COPYed into a temporary staging table chunk by chunk and
+        then merged into products and inventory_transactions with two set-based
+        statements, all in one transaction. Invalid rows are reported per row
+        and skipped, as with add_product-based imports.
+        """
         import csv
         import io
         
         success_count = 0
         errors = []
         
-        try:
-            csv_file = io.StringIO(csv_content)
-            reader = csv.DictReader(csv_file)
-            
-            for row_num, row in enumerate(reader, start=2):
+        if isinstance(csv_file.read(0), bytes):
+            csv_file = io.TextIOWrapper(csv_file, encoding='utf-8-sig', newline='')
+        
+        with self.write_lock():
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                
                 try:
-                    name = row.get('name', '').strip()
-                    description = row.get('description', '').strip()
-                    price = float(row.get('price', 0))
-                    stock = int(row.get('stock_quantity', 0))
-                    category = row.get('category', '').strip() or None
-                    sku = row.get('sku', '').strip() or None
+                    cursor.execute("""
+                        CREATE TEMP TABLE product_import_staging (
+                            row_num INTEGER NOT NULL,
+                            name VARCHAR(255) NOT NULL,
+                            description TEXT,
+                            price DECIMAL(10, 2) NOT NULL,
+                            stock_quantity INTEGER NOT NULL,
+                            category VARCHAR(100),
+                            sku VARCHAR(100)
+                        ) ON COMMIT DROP
+                    """)
                     
-                    if not name or price <= 0:
-                        errors.append(f"Row {row_num}: Invalid name or price")
-                        continue
+                    def copy_chunk(chunk):
+                        buffer = io.StringIO()
+                        writer = csv.writer(buffer)
+                        for values in chunk:
+                            writer.writerow(['\\N' if value is None else value for value in values])
+                        buffer.seek(0)
+                        cursor.copy_expert(
+                            "COPY product_import_staging (row_num, name, description, price, stock_quantity, category, sku) "
+                            "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                            buffer
+                        )
                     
-                    self.add_product(name, description, price, stock, category, sku)
-                    success_count += 1
+                    reader = csv.DictReader(csv_file)
+                    chunk = []
+                    for row_num, row in enumerate(reader, start=2):
+                        try:
+                            chunk.append((row_num,) + self._parse_import_row(row))
+                        except Exception as e:
+                            errors.append(f"Row {row_num}: {str(e)}")
+                            continue
+                        
+                        if len(chunk) >= chunk_size:
+                            copy_chunk(chunk)
+                            chunk = []
                     
+                    if chunk:
+                        copy_chunk(chunk)
+                    
+                    # Merge staged rows in file order, logging initial stock like add_product
+                    cursor.execute("""
+                        WITH inserted AS (
+                            INSERT INTO products (name, description, price, stock_quantity, category, sku)
+                            SELECT name, description, price, stock_quantity, category, sku
+                            FROM product_import_staging
+                            ORDER BY row_num
+                            RETURNING id, stock_quantity
+                        )
+                        INSERT INTO inventory_transactions (product_id, transaction_type, quantity_change, notes)
+                        SELECT id, 'initial_stock', stock_quantity, 'Initial stock'
+                        FROM inserted
+                    """)
+                    success_count = cursor.rowcount
+                    
+                    self._notify_catalog_change(cursor)
+                    conn.commit()
+                    self.catalog_cache.invalidate()
+                    return success_count, errors
+                    
+                except csv.Error as e:
+                    conn.rollback()
+                    return 0, [f"CSV parsing error: {str(e)}"]
                 except Exception as e:
-                    errors.append(f"Row {row_num}: {str(e)}")
-            
-            return success_count, errors
-            
-        except Exception as e:
-            return 0, [f"CSV parsing error: {str(e)}"]
-
-
-
+                    conn.rollback()
+                    return 0, errors + [f"Import failed: {str(e)}"]
+    
+    # Render profiling samples
+    def record_render_profile(self, sample: Dict) -> bool:
+        """Persist one profiled rerun (see profiling.RerunProfile.finish)"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("""
+                    INSERT INTO render_profile_samples
+                        (recorded_at, release, role, page, total_ms, db_ms, dataframe_ms, charts_ms, render_ms, db_calls)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, (
+                    sample['recorded_at'], sample['release'], sample['role'], sample['page'],
+                    sample['total_ms'], sample['db_ms'], sample['dataframe_ms'], sample['charts_ms'],
+                    sample['render_ms'], sample['db_calls']
+                ))
+                conn.commit()
+                return True
+            except psycopg2.Error:
+                conn.rollback()
+                return False
+    
+    def get_render_profile_summary(self, days: int = 7) -> List[Dict]:
+        """Rerun timings per release and page over the last `days` days, slowest p95 first"""
+        with self.connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("""
+                SELECT
+                    release, page, COUNT(*) AS samples,
+                    percentile_cont(0.5) WITHIN GROUP (ORDER BY total_ms) AS p50_ms,
+                    percentile_cont(0.95) WITHIN GROUP (ORDER BY total_ms) AS p95_ms,
+                    AVG(db_ms) AS db_ms, AVG(dataframe_ms) AS dataframe_ms,
+                    AVG(charts_ms) AS charts_ms, AVG(render_ms) AS render_ms,
+                    AVG(db_calls)::float8 AS db_calls,
+                    MAX(recorded_at) AS last_seen
+                FROM render_profile_samples
+                WHERE recorded_at >= CURRENT_TIMESTAMP - make_interval(days => %s)
+                GROUP BY release, page
+                ORDER BY p95_ms DESC
+            """, (days,))
+            rows = cursor.fetchall()
+        return [dict(row) for row in rows]
@@ -0,0 +1,416 @@
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+import psycopg2.extensions
+from psycopg2.extras import RealDictCursor
+
+from profiling import current_profile
+
+slow_query_logger = logging.getLogger('omnitrack.slow_queries')
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# DatabaseManager method currently executing, so statements can be attributed to it
+_current_method = contextvars.ContextVar('current_db_method', default=None)
+
+
+class Histogram:
+    """Cumulative latency histogram in Prometheus layout"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def cumulative(self) -> List[tuple]:
+        total = 0
+        result = []
+        for bound, count in zip(list(self.buckets) + [float('inf')], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound containing the q-quantile (approximate)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        for bound, total in self.cumulative():
+            if total >= target:
+                return bound
+        return float('inf')
+
+
+def normalize_sql(query) -> str:
+    """Collapse whitespace so the same statement always maps to one key"""
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', errors='replace')
+    query = re.sub(r'\s+', ' ', query).strip()
+    # execute_values expands VALUES lists; keep one key per statement shape
+    query = re.sub(r'VALUES \(.*\)$', 'VALUES (...)', query)
+    return query[:300]
+
+
+class QueryStats:
+    """Thread-safe registry of database timings.
+
+    Records per DatabaseManager method and per SQL statement: call counts,
+    latency histograms and rows returned, plus connection acquisition and
+    write-lock wait times. Statements slower than slow_query_ms are logged
+    to the 'omnitrack.slow_queries' logger.
+    """
+
+    def __init__(self, slow_query_ms: float = 500.0):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self.methods: Dict[str, Dict] = {}
+        self.statements: Dict[tuple, Dict] = {}
+        self.connection_acquire = Histogram()
+        self.lock_wait = Histogram()
+        self.started_at = time.time()
+        self.gauges: Optional[Callable[[], Dict]] = None
+
+    def record_method(self, method: str, seconds: float, failed: bool = False):
+        with self._lock:
+            entry = self.methods.setdefault(method, {'calls': 0, 'errors': 0, 'latency': Histogram()})
+            entry['calls'] += 1
+            if failed:
+                entry['errors'] += 1
+            entry['latency'].observe(seconds)
+
+    def record_statement(self, query, seconds: float, rows: int):
+        method = _current_method.get() or 'unattributed'
+        sql = normalize_sql(query)
+        with self._lock:
+            entry = self.statements.setdefault(
+                (method, sql), {'calls': 0, 'rows': 0, 'latency': Histogram()}
+            )
+            entry['calls'] += 1
+            entry['rows'] += max(rows, 0)
+            entry['latency'].observe(seconds)
+
+        if self.slow_query_ms and seconds * 1000 >= self.slow_query_ms:
+            slow_query_logger.warning("Slow query in %s (%.1f ms, %d rows): %s", method, seconds * 1000, rows, sql)
+
+    def record_connection_acquire(self, seconds: float):
+        with self._lock:
+            self.connection_acquire.observe(seconds)
+
+    def record_lock_wait(self, seconds: float):
+        with self._lock:
+            self.lock_wait.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.methods.clear()
+            self.statements.clear()
+            self.connection_acquire = Histogram()
+            self.lock_wait = Histogram()
+            self.started_at = time.time()
+
+    def snapshot(self) -> Dict:
+        """Plain-dict dump of the current counters, slowest methods first"""
+        with self._lock:
+            methods = [
+                {
+                    'method': name,
+                    'calls': entry['calls'],
+                    'errors': entry['errors'],
+                    'total_seconds': entry['latency'].sum,
+                    'avg_ms': entry['latency'].sum / entry['calls'] * 1000,
+                    'p95_ms': entry['latency'].quantile(0.95) * 1000,
+                }
+                for name, entry in self.methods.items()
+            ]
+            statements = [
+                {
+                    'method': method,
+                    'statement': sql,
+                    'calls': entry['calls'],
+                    'rows': entry['rows'],
+                    'total_seconds': entry['latency'].sum,
+                    'avg_ms': entry['latency'].sum / entry['calls'] * 1000,
+                    'p95_ms': entry['latency'].quantile(0.95) * 1000,
+                }
+                for (method, sql), entry in self.statements.items()
+            ]
+            snapshot = {
+                'since': self.started_at,
+                'methods': sorted(methods, key=lambda m: m['total_seconds'], reverse=True),
+                'statements': sorted(statements, key=lambda s: s['total_seconds'], reverse=True),
+                'connection_acquire': {'count': self.connection_acquire.count, 'total_seconds': self.connection_acquire.sum},
+                'lock_wait': {'count': self.lock_wait.count, 'total_seconds': self.lock_wait.sum},
+            }
+        if self.gauges:
+            snapshot['pool'] = self.gauges()
+        return snapshot
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+
+        def labels(**values) -> str:
+            escaped = []
+            for key, value in values.items():
+                value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+                escaped.append(f'{key}="{value}"')
+            return '{' + ','.join(escaped) + '}' if escaped else ''
+
+        def histogram(name: str, hist: Histogram, **label_values):
+            for bound, total in hist.cumulative():
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{name}_bucket{labels(**label_values, le=le)} {total}")
+            lines.append(f"{name}_sum{labels(**label_values)} {hist.sum}")
+            lines.append(f"{name}_count{labels(**label_values)} {hist.count}")
+
+        with self._lock:
+            lines.append("# HELP omnitrack_db_method_errors_total DatabaseManager calls that raised")
+            lines.append("# TYPE omnitrack_db_method_errors_total counter")
+            for name, entry in self.methods.items():
+                lines.append(f"omnitrack_db_method_errors_total{labels(method=name)} {entry['errors']}")
+
+            lines.append("# HELP omnitrack_db_method_duration_seconds DatabaseManager method latency")
+            lines.append("# TYPE omnitrack_db_method_duration_seconds histogram")
+            for name, entry in self.methods.items():
+                histogram('omnitrack_db_method_duration_seconds', entry['latency'], method=name)
+
+            lines.append("# HELP omnitrack_db_statement_duration_seconds SQL statement latency")
+            lines.append("# TYPE omnitrack_db_statement_duration_seconds histogram")
+            for (method, sql), entry in self.statements.items():
+                histogram('omnitrack_db_statement_duration_seconds', entry['latency'], method=method, statement=sql)
+
+            lines.append("# HELP omnitrack_db_statement_rows_total Rows returned or affected by SQL statements")
+            lines.append("# TYPE omnitrack_db_statement_rows_total counter")
+            for (method, sql), entry in self.statements.items():
+                lines.append(f"omnitrack_db_statement_rows_total{labels(method=method, statement=sql)} {entry['rows']}")
+
+            lines.append("# HELP omnitrack_db_connection_acquire_seconds Time spent checking out a pooled connection")
+            lines.append("# TYPE omnitrack_db_connection_acquire_seconds histogram")
+            histogram('omnitrack_db_connection_acquire_seconds', self.connection_acquire)
+
+            lines.append("# HELP omnitrack_db_lock_wait_seconds Time spent waiting for DatabaseManager.lock")
+            lines.append("# TYPE omnitrack_db_lock_wait_seconds histogram")
+            histogram('omnitrack_db_lock_wait_seconds', self.lock_wait)
+
+        if self.gauges:
+            for key, value in self.gauges().items():
+                if isinstance(value, (int, float)):
+                    lines.append(f"# TYPE omnitrack_db_pool_{key} gauge")
+                    lines.append(f"omnitrack_db_pool_{key} {value}")
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        """Atomically write the Prometheus text dump to path (for node_exporter's textfile collector)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def start_file_exporter(self, path: str, interval: float = 15.0) -> threading.Thread:
+        def run():
+            while True:
+                try:
+                    self.write_prometheus(path)
+                except OSError:
+                    logging.getLogger(__name__).exception("Failed to write metrics file %s", path)
+                time.sleep(interval)
+
+        thread = threading.Thread(target=run, name='db-metrics-file', daemon=True)
+        thread.start()
+        return thread
+
+    def start_http_exporter(self, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """Serve /metrics on a background thread.
+
+        The output includes normalised SQL text, so it listens on loopback
+        unless a wider host (e.g. '0.0.0.0') is passed explicitly.
+        """
+        stats = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') != '/metrics':
+                    self.send_error(404)
+                    return
+                body = stats.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name='db-metrics-http', daemon=True).start()
+        return server
+
+
+class _InstrumentedCursorMixin:
+    """Times execute() calls and records them on the attached QueryStats"""
+
+    _query_stats: Optional[QueryStats] = None
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            with _db_phase():
+                return super().execute(query, vars)
+        finally:
+            if self._query_stats is not None:
+                self._query_stats.record_statement(query, time.perf_counter() - start, self.rowcount)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        try:
+            with _db_phase():
+                return super().executemany(query, vars_list)
+        finally:
+            if self._query_stats is not None:
+                self._query_stats.record_statement(query, time.perf_counter() - start, self.rowcount)
+
+
+def _db_phase():
+    """Charge a statement or method to the rerun profile's 'db' phase.
+
+    Only the outermost DatabaseManager method (or a statement run outside
+    one, e.g. from analytics) is charged, so nested calls aren't counted twice.
+    """
+    profile = current_profile()
+    if profile is None or _current_method.get() is not None:
+        return nullcontext()
+    return profile.phase('db')
+
+
+class InstrumentedCursor(_InstrumentedCursorMixin, psycopg2.extensions.cursor):
+    pass
+
+
+class InstrumentedRealDictCursor(_InstrumentedCursorMixin, RealDictCursor):
+    pass
+
+
+_INSTRUMENTED_FACTORIES = {
+    None: InstrumentedCursor,
+    psycopg2.extensions.cursor: InstrumentedCursor,
+    RealDictCursor: InstrumentedRealDictCursor,
+}
+
+
+def instrumented_cursor(conn, stats: QueryStats, *args, **kwargs):
+    """conn.cursor(...) with the cursor class swapped for its instrumented twin"""
+    factory = kwargs.get('cursor_factory')
+    if factory in _INSTRUMENTED_FACTORIES:
+        kwargs['cursor_factory'] = _INSTRUMENTED_FACTORIES[factory]
+    cursor = conn.cursor(*args, **kwargs)
+    if isinstance(cursor, _InstrumentedCursorMixin):
+        cursor._query_stats = stats
+    return cursor
+
+
+def instrument_methods(exclude=()):
+    """Class decorator timing every public method of a DatabaseManager-like class.
+
+    Timing is recorded on self.query_stats when it is set; statements are
+    attributed to the innermost instrumented method running at the time.
+    Calls made during a profiled rerun are also charged to its 'db' phase.
+    A method that returns a generator (the stream_*_csv exports) is timed
+    over its iteration as well, and recorded once the generator is exhausted,
+    closed or fails.
+    """
+    def decorate(cls):
+        for name, func in list(vars(cls).items()):
+            if name.startswith('_') or name in exclude or not inspect.isfunction(func):
+                continue
+            setattr(cls, name, _timed_method(name, func))
+        return cls
+
+    return decorate
+
+
+def _timed_method(name: str, func):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        stats = getattr(self, 'query_stats', None)
+        if stats is None and current_profile() is None:
+            return func(self, *args, **kwargs)
+
+        timer = _MethodTimer(name, stats)
+        try:
+            result = timer.step(func, self, *args, **kwargs)
+        except Exception:
+            timer.record(failed=True)
+            raise
+        if inspect.isgenerator(result):
+            # The queries run while the caller iterates, not in this call
+            return timer.iterate(result)
+        timer.record()
+        return result
+
+    return wrapper
+
+
+_EXHAUSTED = object()
+
+
+class _MethodTimer:
+    """Time spent inside one call of an instrumented method, over one or more steps"""
+
+    def __init__(self, name: str, stats):
+        self.name = name
+        self.stats = stats
+        self.elapsed = 0.0
+
+    def step(self, func, *args, **kwargs):
+        phase = _db_phase()
+        token = _current_method.set(self.name)
+        start = time.perf_counter()
+        try:
+            with phase:
+                return func(*args, **kwargs)
+        finally:
+            _current_method.reset(token)
+            self.elapsed += time.perf_counter() - start
+
+    def iterate(self, generator):
+        """Yield from generator, timing each resume as part of the method"""
+        failed = False
+        try:
+            while True:
+                item = self.step(next, generator, _EXHAUSTED)
+                if item is _EXHAUSTED:
+                    return
+                yield item
+        except Exception:
+            failed = True
+            raise
+        finally:
+            # Abandoned early: close now so the generator's cleanup is timed too
+            self.step(generator.close)
+            self.record(failed)
+
+    def record(self, failed: bool = False):
+        if self.stats is not None:
+            self.stats.record_method(self.name, self.elapsed, failed)
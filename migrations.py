@@ -0,0 +1,141 @@
+# migrations.py
+from typing import List
+import psycopg2
+from rollups import ROLLUP_TABLES_DDL, rebuild_rollups
+
+
+def create_trigram_search_indexes(cursor):
+    """Trigram indexes for the substring fallback of product search.
+
+    pg_trgm needs CREATE privilege on the database; without it the fallback
+    still works, as a sequential ILIKE scan, so a refusal is not an error.
+    """
+    cursor.execute("SAVEPOINT pg_trgm")
+    try:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except psycopg2.Error:
+        cursor.execute("ROLLBACK TO SAVEPOINT pg_trgm")
+        return
+    cursor.execute("RELEASE SAVEPOINT pg_trgm")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING GIN (name gin_trgm_ops)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_description_trgm ON products USING GIN (description gin_trgm_ops)")
+
+
+# Versioned schema changes applied on top of the base tables created by
+# DatabaseManager.init_database. Each entry is (version, name, statements);
+# versions are applied in order, once, and recorded in schema_migrations.
+# A step is either an SQL string or a callable taking the cursor.
+MIGRATIONS = [
+    (1, 'hot_lookup_indexes', [
+        "CREATE INDEX IF NOT EXISTS idx_orders_username_created_at ON orders (username, created_at DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders (created_at DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status)",
+        "CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items (order_id)",
+        "CREATE INDEX IF NOT EXISTS idx_inventory_transactions_product_created ON inventory_transactions (product_id, created_at DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_reserved_inventory_expires_at ON reserved_inventory (expires_at)",
+        "CREATE INDEX IF NOT EXISTS idx_products_category ON products (category)",
+    ]),
+    (2, 'unique_cart_line', [
+        # Merge duplicate cart lines left by the old check-then-insert add_to_cart
+        """
+        WITH merged AS (
+            SELECT username, product_id, MIN(id) AS keep_id, SUM(quantity) AS quantity
+            FROM shopping_cart
+            GROUP BY username, product_id
+            HAVING COUNT(*) > 1
+        ),
+        kept AS (
+            UPDATE shopping_cart c
+            SET quantity = merged.quantity
+            FROM merged
+            WHERE c.id = merged.keep_id
+        )
+        DELETE FROM shopping_cart c
+        USING merged
+        WHERE c.username = merged.username
+            AND c.product_id = merged.product_id
+            AND c.id <> merged.keep_id
+        """,
+        # Also serves as the (username, product_id) lookup index
+        "ALTER TABLE shopping_cart ADD CONSTRAINT shopping_cart_username_product_key UNIQUE (username, product_id)",
+    ]),
+    (3, 'product_search_vector', [
+        # 'simple' (no stemming) so prefix terms match the words as typed. Prefix
+        # terms only match word starts; mid-word matches go through the ILIKE
+        # fallback in DatabaseManager.search_products, indexed by the trigram step
+        """
+        ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+        ) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_products_search_vector ON products USING GIN (search_vector)",
+        create_trigram_search_indexes,
+    ]),
+    (4, 'daily_sales_rollups', ROLLUP_TABLES_DDL + [rebuild_rollups]),
+    (5, 'render_profile_samples', [
+        # Per-rerun timings written when render profiling is on (see profiling.py)
+        """
+        CREATE TABLE IF NOT EXISTS render_profile_samples (
+            id BIGSERIAL PRIMARY KEY,
+            recorded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            release VARCHAR(100) NOT NULL DEFAULT '',
+            role VARCHAR(50),
+            page VARCHAR(100),
+            total_ms DOUBLE PRECISION NOT NULL,
+            db_ms DOUBLE PRECISION NOT NULL,
+            dataframe_ms DOUBLE PRECISION NOT NULL,
+            charts_ms DOUBLE PRECISION NOT NULL,
+            render_ms DOUBLE PRECISION NOT NULL,
+            db_calls INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_render_profile_samples_recorded_at ON render_profile_samples (recorded_at DESC)",
+    ]),
+    (6, 'inventory_ledger_keyset', [
+        # Keyset pagination compares (created_at, id); NULLs would fall out of every page
+        "UPDATE inventory_transactions SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL",
+        "ALTER TABLE inventory_transactions ALTER COLUMN created_at SET NOT NULL",
+        "CREATE INDEX IF NOT EXISTS idx_inventory_transactions_created_id ON inventory_transactions (created_at DESC, id DESC)",
+        # Supersedes idx_inventory_transactions_product_created for per-product pages
+        "CREATE INDEX IF NOT EXISTS idx_inventory_transactions_product_created_id ON inventory_transactions (product_id, created_at DESC, id DESC)",
+        "DROP INDEX IF EXISTS idx_inventory_transactions_product_created",
+    ]),
+]
+
+LATEST_SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def apply_migrations(cursor) -> List[int]:
+    """Apply pending migrations with the given cursor. Returns the versions applied.
+
+    Runs inside the caller's transaction, so a failing migration rolls back
+    together with its schema_migrations record.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT version FROM schema_migrations")
+    applied_versions = {row[0] for row in cursor.fetchall()}
+
+    applied = []
+    for version, name, statements in MIGRATIONS:
+        if version in applied_versions:
+            continue
+        for statement in statements:
+            if callable(statement):
+                statement(cursor)
+            else:
+                cursor.execute(statement)
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+            (version, name)
+        )
+        applied.append(version)
+
+    return applied
@@ -1,5 +1,5 @@
 import streamlit as st
-import pandas as pd
+from utils import show_pagination_controls
 
 def show_shop_page(db, username):
     st.title("🛍️ Shop")
@@ -11,33 +11,32 @@ def show_shop_page(db, username):
         search_term = st.text_input("🔍 Search products", placeholder="Search by name or description...")
     
     with col2:
-        categories = list(set(p['category'] for p in db.get_all_products() if p['category']))
+        categories = db.get_product_categories()
         selected_category = st.selectbox("Category", ["All"] + categories)
     
     with col3:
-        sort_by = st.selectbox("Sort by", ["Name", "Price (Low to High)", "Price (High to Low)", "Stock"])
+        sort_options = {
+            "Name": 'name',
+            "Price (Low to High)": 'price_asc',
+            "Price (High to Low)": 'price_desc',
+            "Stock": 'stock'
+        }
+        if search_term:
+            sort_options = {"Relevance": 'relevance', **sort_options}
+        sort_by = st.selectbox("Sort by", list(sort_options.keys()))
     
-    # Get products
-    products = db.get_all_products()
+    category = selected_category if selected_category != "All" else None
     
-    # Apply filters
     if search_term:
-        products = [p for p in products if 
-                   search_term.lower() in p['name'].lower() or 
-                   search_term.lower() in (p['description'] or '').lower()]
-    
-    if selected_category != "All":
-        products = [p for p in products if p['category'] == selected_category]
-    
-    # Apply sorting
-    if sort_by == "Name":
-        products.sort(key=lambda x: x['name'])
-    elif sort_by == "Price (Low to High)":
-        products.sort(key=lambda x: x['price'])
-    elif sort_by == "Price (High to Low)":
-        products.sort(key=lambda x: x['price'], reverse=True)
-    elif sort_by == "Stock":
-        products.sort(key=lambda x: x['stock_quantity'], reverse=True)
+        # Full-text search, ranking and pagination run in Postgres
+        total_count = db.count_products(search_term, category)
+        limit, offset = show_pagination_controls(total_count, key="shop")
+        products = db.search_products(search_term, category, sort_options[sort_by], limit, offset)
+    else:
+        # Plain browsing is served from the columnar catalog index
+        selection = db.browse_products(category, sort_options[sort_by])
+        limit, offset = show_pagination_controls(len(selection), key="shop")
+        products = selection.page(limit, offset)
     
     # Display products
     if products:
@@ -80,27 +79,30 @@ def show_shop_page(db, username):
 def show_my_orders_page(db, username):
     st.title("📋 My Orders")
     
-    orders = db.get_user_orders(username)
+    status_summary = db.get_order_status_summary(username=username)
     
-    if orders:
+    if status_summary:
         # Order summary
         col1, col2, col3 = st.columns(3)
+        delivered = status_summary.get('delivered', {'count': 0, 'total_amount': 0})
         
         with col1:
-            total_orders = len(orders)
+            total_orders = sum(s['count'] for s in status_summary.values())
             st.metric("Total Orders", total_orders)
         
         with col2:
-            delivered_orders = [o for o in orders if o['status'] == 'delivered']
-            st.metric("Delivered Orders", len(delivered_orders))
+            st.metric("Delivered Orders", delivered['count'])
         
         with col3:
-            total_spent = sum(o['total_amount'] for o in delivered_orders)
+            total_spent = delivered['total_amount']
             st.metric("Total Spent", f"${total_spent:.2f}")
         
         st.divider()
         
         # Orders list
+        limit, offset = show_pagination_controls(total_orders, key="my_orders")
+        orders = db.query_orders(username=username, limit=limit, offset=offset, include_items=True)
+        
         for order in orders:
             status_color = {
                 'placed': '🟡',
@@ -138,7 +140,7 @@ def show_my_orders_page(db, username):
                                     st.error("Failed to cancel order")
                 
                 # Show order items
-                items = db.get_order_items(order['id'])
+                items = order['items']
                 if items:
                     st.write("**Items Ordered:**")
                     for item in items:
@@ -214,26 +216,16 @@ def show_cart_page(db, username):
             
             with col1:
                 if st.button("Place Order", type="primary", use_container_width=True):
-                    # Reserve inventory and create order
-                    can_reserve = True
-                    for item in cart_items:
-                        if not db.reserve_inventory(item['product_id'], username, item['quantity']):
-                            can_reserve = False
-                            break
-                    
-                    if can_reserve:
-                        order_id = db.create_order(username, cart_items)
-                        if order_id:
-                            st.success(f"✅ Order #{order_id} placed successfully!")
-                            st.balloons()
-                            st.rerun()
-                        else:
-                            # Release reservations if order creation failed
-                            for item in cart_items:
-                                db.release_reservation(item['product_id'], username, item['quantity'])
-                            st.error("Failed to create order. Please try again.")
+                    # Validate stock, decrement it and create the order atomically
+                    order_id, checkout_errors = db.checkout(username)
+                    if order_id:
+                        st.success(f"✅ Order #{order_id} placed successfully!")
+                        st.balloons()
+                        st.rerun()
                     else:
-                        st.error("Unable to reserve inventory. Some items may be out of stock.")
+                        st.error("Unable to place order. Some items may be out of stock.")
+                        for error in checkout_errors:
+                            st.write(f"• {error}")
             
             with col2:
                 if st.button("Clear Cart", type="secondary", use_container_width=True):
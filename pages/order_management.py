@@ -1,5 +1,10 @@
 import streamlit as st
 import pandas as pd
+from utils import show_pagination_controls, show_top_selling_products, show_bulk_status_action
+import analytics
+from functools import partial
+from async_database import AsyncDatabaseManager
+from profiling import profile_phase
 
 def show_admin_order_management_page(db):
     st.title("📋 Order Management")
@@ -18,9 +23,7 @@ def show_admin_order_management_page(db):
 def show_all_orders(db):
     st.subheader("All Orders")
     
-    orders = db.get_all_orders()
-    
-    if orders:
+    if db.count_orders() > 0:
         # Filters
         col1, col2, col3 = st.columns(3)
         
@@ -31,31 +34,39 @@ def show_all_orders(db):
             )
         
         with col2:
-            # Get unique usernames
-            usernames = list(set(order['username'] for order in orders))
-            user_filter = st.selectbox("Filter by Customer", ["All"] + usernames)
+            user_filter = st.selectbox("Filter by Customer", ["All"] + db.get_order_customers())
         
         with col3:
-            sort_by = st.selectbox("Sort by", ["Recent First", "Oldest First", "Amount (High to Low)", "Amount (Low to High)"])
-        
-        # Apply filters
-        filtered_orders = orders.copy()
-        
-        if status_filter != "All":
-            filtered_orders = [o for o in filtered_orders if o['status'] == status_filter]
+            sort_options = {
+                "Recent First": 'recent',
+                "Oldest First": 'oldest',
+                "Amount (High to Low)": 'amount_desc',
+                "Amount (Low to High)": 'amount_asc'
+            }
+            sort_by = st.selectbox("Sort by", list(sort_options.keys()))
         
-        if user_filter != "All":
-            filtered_orders = [o for o in filtered_orders if o['username'] == user_filter]
-        
-        # Apply sorting
-        if sort_by == "Recent First":
-            filtered_orders.sort(key=lambda x: x['created_at'], reverse=True)
-        elif sort_by == "Oldest First":
-            filtered_orders.sort(key=lambda x: x['created_at'])
-        elif sort_by == "Amount (High to Low)":
-            filtered_orders.sort(key=lambda x: x['total_amount'], reverse=True)
-        elif sort_by == "Amount (Low to High)":
-            filtered_orders.sort(key=lambda x: x['total_amount'])
+        col1, col2 = st.columns(2)
+        with col1:
+            start_date = st.date_input("From date", value=None, key="orders_start_date")
+        with col2:
+            end_date = st.date_input("To date", value=None, key="orders_end_date")
+        
+        # Filtering, sorting and pagination run in the database
+        filters = {
+            'statuses': [status_filter] if status_filter != "All" else None,
+            'username': user_filter if user_filter != "All" else None,
+            'start_date': start_date,
+            'end_date': end_date
+        }
+        total_count = db.count_orders(**filters)
+        limit, offset = show_pagination_controls(total_count, key="all_orders")
+        filtered_orders = db.query_orders(
+            **filters,
+            sort_by=sort_options[sort_by],
+            limit=limit,
+            offset=offset,
+            include_items=True
+        )
         
         # Display orders
         if filtered_orders:
@@ -82,14 +93,15 @@ def show_all_orders(db):
                         st.write(f"**Last Updated:** {order['updated_at']}")
                     
                     # Order items
-                    items = db.get_order_items(order['id'])
+                    items = order['items']
                     if items:
                         st.write("**Order Items:**")
-                        items_df = pd.DataFrame(items)
-                        items_df['subtotal'] = items_df['quantity'] * items_df['unit_price']
-                        
-                        display_df = items_df[['product_name', 'quantity', 'unit_price', 'subtotal']]
-                        display_df.columns = ['Product', 'Qty', 'Unit Price ($)', 'Subtotal ($)']
+                        with profile_phase('dataframe'):
+                            items_df = pd.DataFrame(items)
+                            items_df['subtotal'] = items_df['quantity'] * items_df['unit_price']
+                            
+                            display_df = items_df[['product_name', 'quantity', 'unit_price', 'subtotal']]
+                            display_df.columns = ['Product', 'Qty', 'Unit Price ($)', 'Subtotal ($)']
                         st.dataframe(display_df, use_container_width=True)
                     
                     # Admin actions
@@ -124,135 +136,116 @@ def show_all_orders(db):
 def show_order_analytics(db):
     st.subheader("Order Analytics")
     
-    orders = db.get_all_orders()
+    # All aggregates are computed in Postgres and fetched concurrently
+    data = AsyncDatabaseManager.for_manager(db).fetch_all(
+        kpis=partial(analytics.get_order_kpis, db),
+        status_counts=partial(analytics.get_status_counts, db),
+        top_customers=partial(analytics.get_top_customers, db, limit=10),
+        daily_orders=partial(analytics.get_daily_sales, db, statuses=['delivered'])
+    )
+    kpis = data['kpis']
     
-    if orders:
+    if kpis['total_orders']:
         import plotly.express as px
-        import plotly.graph_objects as go
         
         # Summary metrics
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Total Orders", len(orders))
+            st.metric("Total Orders", kpis['total_orders'])
         
         with col2:
-            avg_order_value = sum(o['total_amount'] for o in orders) / len(orders)
-            st.metric("Avg Order Value", f"${avg_order_value:.2f}")
+            st.metric("Avg Order Value", f"${kpis['avg_order_value']:.2f}")
         
         with col3:
-            delivered_orders = [o for o in orders if o['status'] == 'delivered']
-            completion_rate = len(delivered_orders) / len(orders) * 100
-            st.metric("Completion Rate", f"{completion_rate:.1f}%")
+            st.metric("Completion Rate", f"{kpis['completion_rate']:.1f}%")
         
         with col4:
-            total_revenue = sum(o['total_amount'] for o in delivered_orders)
-            st.metric("Total Revenue", f"${total_revenue:.2f}")
+            st.metric("Total Revenue", f"${kpis['total_revenue']:.2f}")
         
         # Charts
         col1, col2 = st.columns(2)
         
         with col1:
             # Status distribution
-            status_counts = {}
-            for order in orders:
-                status = order['status']
-                status_counts[status] = status_counts.get(status, 0) + 1
+            status_counts = data['status_counts']
             
-            fig_status = px.pie(
-                values=list(status_counts.values()),
-                names=list(status_counts.keys()),
-                title="Order Status Distribution"
-            )
-            st.plotly_chart(fig_status, use_container_width=True)
+            with profile_phase('charts'):
+                fig_status = px.pie(
+                    values=status_counts['count'],
+                    names=status_counts['status'],
+                    title="Order Status Distribution"
+                )
+                st.plotly_chart(fig_status, use_container_width=True)
         
         with col2:
-            # Orders by customer
-            customer_orders = {}
-            for order in orders:
-                customer = order['username']
-                if customer not in customer_orders:
-                    customer_orders[customer] = {'count': 0, 'total': 0}
-                customer_orders[customer]['count'] += 1
-                customer_orders[customer]['total'] += order['total_amount']
-            
             # Top customers by order count
-            top_customers = sorted(customer_orders.items(), key=lambda x: x[1]['count'], reverse=True)[:10]
+            top_customers = data['top_customers']
             
-            if top_customers:
-                customers = [c[0] for c in top_customers]
-                counts = [c[1]['count'] for c in top_customers]
-                
-                fig_customers = px.bar(
-                    x=counts,
-                    y=customers,
-                    orientation='h',
-                    title="Top Customers by Order Count"
-                )
-                fig_customers.update_layout(yaxis={'categoryorder': 'total ascending'})
-                st.plotly_chart(fig_customers, use_container_width=True)
+            if not top_customers.empty:
+                with profile_phase('charts'):
+                    fig_customers = px.bar(
+                        x=top_customers['order_count'],
+                        y=top_customers['username'],
+                        orientation='h',
+                        title="Top Customers by Order Count"
+                    )
+                    fig_customers.update_layout(yaxis={'categoryorder': 'total ascending'})
+                    st.plotly_chart(fig_customers, use_container_width=True)
         
         # Order timeline
-        if delivered_orders:
-            df_orders = pd.DataFrame(delivered_orders)
-            df_orders['created_at'] = pd.to_datetime(df_orders['created_at'])
-            
-            # Daily orders
-            daily_orders = df_orders.groupby(df_orders['created_at'].dt.date).agg({
-                'id': 'count',
-                'total_amount': 'sum'
-            }).reset_index()
-            daily_orders.columns = ['Date', 'Order Count', 'Revenue']
+        if kpis['delivered_orders']:
+            daily_orders = data['daily_orders']
             
             col1, col2 = st.columns(2)
             
             with col1:
-                fig_daily_orders = px.line(daily_orders, x='Date', y='Order Count', title='Daily Order Count')
-                st.plotly_chart(fig_daily_orders, use_container_width=True)
+                with profile_phase('charts'):
+                    fig_daily_orders = px.line(daily_orders, x='Date', y='Order Count', title='Daily Order Count')
+                    st.plotly_chart(fig_daily_orders, use_container_width=True)
             
             with col2:
-                fig_daily_revenue = px.line(daily_orders, x='Date', y='Revenue', title='Daily Revenue')
-                st.plotly_chart(fig_daily_revenue, use_container_width=True)
+                with profile_phase('charts'):
+                    fig_daily_revenue = px.line(daily_orders, x='Date', y='Revenue', title='Daily Revenue')
+                    st.plotly_chart(fig_daily_revenue, use_container_width=True)
+        
+        show_top_selling_products(db, key="analytics_top_sellers")
     else:
         st.info("No order data available for analytics.")
 
 def show_order_actions(db):
     st.subheader("Bulk Order Actions")
     
-    orders = db.get_all_orders()
-    pending_orders = [o for o in orders if o['status'] in ['placed', 'paid']]
+    placed_count = db.count_orders(statuses=['placed'])
+    paid_count = db.count_orders(statuses=['paid'])
     
-    if pending_orders:
+    if placed_count or paid_count:
         st.write("**Bulk Actions for Pending Orders:**")
         
         # Mark multiple orders as paid
-        placed_orders = [o for o in pending_orders if o['status'] == 'placed']
-        if placed_orders:
-            st.write("**Mark as Paid:**")
-            for order in placed_orders:
-                col1, col2 = st.columns([3, 1])
-                with col1:
-                    st.write(f"Order #{order['id']} - {order['username']} - ${order['total_amount']:.2f}")
-                with col2:
-                    if st.button("Mark Paid", key=f"bulk_pay_{order['id']}", type="secondary"):
-                        if db.update_order_status(order['id'], 'paid'):
-                            st.success(f"Order #{order['id']} marked as paid!")
-                            st.rerun()
+        st.write("**Mark as Paid:**")
+        show_bulk_status_page(db, placed_count, 'placed', 'paid', "Mark Paid", key="bulk_pay")
         
         st.divider()
         
         # Mark multiple orders as delivered
-        paid_orders = [o for o in pending_orders if o['status'] == 'paid']
-        if paid_orders:
-            st.write("**Mark as Delivered:**")
-            for order in paid_orders:
-                col1, col2 = st.columns([3, 1])
-                with col1:
-                    st.write(f"Order #{order['id']} - {order['username']} - ${order['total_amount']:.2f}")
-                with col2:
-                    if st.button("Mark Delivered", key=f"bulk_deliver_{order['id']}", type="primary"):
-                        if db.update_order_status(order['id'], 'delivered'):
-                            st.success(f"Order #{order['id']} marked as delivered!")
-                            st.rerun()
+        st.write("**Mark as Delivered:**")
+        show_bulk_status_page(db, paid_count, 'paid', 'delivered', "Mark Delivered", key="bulk_deliver")
     else:
         st.success("✅ No pending orders! All orders are either delivered or cancelled.")
+
+def show_bulk_status_page(db, total_count, from_status, to_status, action_label, key):
+    """Bulk status action over one page of the orders in from_status, loaded with LIMIT/OFFSET"""
+    if not total_count:
+        show_bulk_status_action(db, [], from_status, to_status, action_label, key=key)
+        return
+    
+    limit, offset = show_pagination_controls(total_count, key=key)
+    # Selections from another page are not among this page's options
+    offset_key = f"{key}_offset"
+    if st.session_state.get(offset_key) != offset:
+        st.session_state[offset_key] = offset
+        st.session_state.pop(f"{key}_selected", None)
+    
+    orders = db.query_orders(statuses=[from_status], limit=limit, offset=offset)
+    show_bulk_status_action(db, orders, from_status, to_status, action_label, key=key)
@@ -1,10 +1,13 @@
 import streamlit as st
 import pandas as pd
+from utils import join_csv_chunks
+from database import INVENTORY_TRANSACTION_TYPES
+from profiling import profile_phase
 
 def show_product_management_page(db):
     st.title("📦 Product Management")
     
-    tab1, tab2, tab3 = st.tabs(["View Products", "Add Product", "Update Stock"])
+    tab1, tab2, tab3, tab4 = st.tabs(["View Products", "Add Product", "Update Stock", "Import / Export"])
     
     with tab1:
         show_products_list(db)
@@ -14,6 +17,9 @@ def show_product_management_page(db):
     
     with tab3:
         show_update_stock(db)
+    
+    with tab4:
+        show_import_export(db)
 
 def show_products_list(db):
     st.subheader("All Products")
@@ -21,7 +27,8 @@ def show_products_list(db):
     products = db.get_all_products()
     
     if products:
-        df = pd.DataFrame(products)
+        with profile_phase('dataframe'):
+            df = pd.DataFrame(products)
         
         # Display options
         col1, col2 = st.columns(2)
@@ -41,11 +48,12 @@ def show_products_list(db):
         
         if filtered_products:
             # Create display dataframe
-            df_display = pd.DataFrame(filtered_products)
-            
-            # Format columns for display
-            df_display = df_display[['id', 'name', 'category', 'price', 'stock_quantity', 'description']]
-            df_display.columns = ['ID', 'Name', 'Category', 'Price ($)', 'Stock', 'Description']
+            with profile_phase('dataframe'):
+                df_display = pd.DataFrame(filtered_products)
+                
+                # Format columns for display
+                df_display = df_display[['id', 'name', 'category', 'price', 'stock_quantity', 'description']]
+                df_display.columns = ['ID', 'Name', 'Category', 'Price ($)', 'Stock', 'Description']
             
             # Color code low stock items
             def highlight_low_stock(row):
@@ -144,30 +152,117 @@ def show_update_stock(db):
                         else:
                             st.error("Failed to update stock")
             
-            # Show recent transactions for this product
-            st.subheader("Recent Stock Movements")
-            transactions = db.get_inventory_transactions(selected_product['id'])
-            
-            if transactions:
-                recent_transactions = transactions[:10]  # Show last 10
-                df_transactions = pd.DataFrame(recent_transactions)
-                
-                df_display = df_transactions[['transaction_type', 'quantity_change', 'notes', 'created_at']].copy()
-                df_display.columns = ['Type', 'Change', 'Notes', 'Date']
-                
-                # Color code transaction types
-                def highlight_transactions(row):
-                    if row['Change'] > 0:
-                        return ['background-color: #e8f5e8'] * len(row)  # Green for additions
-                    elif row['Change'] < 0:
-                        return ['background-color: #ffeaa7'] * len(row)  # Yellow for reductions
-                    return [''] * len(row)
-                
-                st.dataframe(
-                    df_display.style.apply(highlight_transactions, axis=1),
-                    use_container_width=True
-                )
-            else:
-                st.info("No stock movements recorded for this product.")
+            # Stock movements for this product, one page at a time
+            st.subheader("Stock Movements")
+            show_stock_movements(db, selected_product['id'])
     else:
         st.info("No products available. Please add products first.")
+
+def show_stock_movements(db, product_id):
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        transaction_types = st.multiselect("Type", INVENTORY_TRANSACTION_TYPES, key="ledger_types")
+    with col2:
+        start_date = st.date_input("From date", value=None, key="ledger_start_date")
+    with col3:
+        end_date = st.date_input("To date", value=None, key="ledger_end_date")
+    with col4:
+        page_size = st.selectbox("Per page", [10, 25, 50, 100], key="ledger_page_size")
+    
+    # Keyset cursor of every page visited so far; reset when the filters change
+    filters = (product_id, tuple(transaction_types), start_date, end_date, page_size)
+    if st.session_state.get('ledger_filters') != filters:
+        st.session_state.ledger_filters = filters
+        st.session_state.ledger_cursors = [None]
+    cursors = st.session_state.ledger_cursors
+    
+    transactions, next_cursor = db.get_inventory_ledger_page(
+        product_id=product_id,
+        transaction_types=transaction_types,
+        start_date=start_date,
+        end_date=end_date,
+        limit=page_size,
+        after=cursors[-1]
+    )
+    
+    if transactions:
+        with profile_phase('dataframe'):
+            df_transactions = pd.DataFrame(transactions)
+            
+            df_display = df_transactions[['transaction_type', 'quantity_change', 'notes', 'created_at']].copy()
+            df_display.columns = ['Type', 'Change', 'Notes', 'Date']
+        
+        # Color code transaction types
+        def highlight_transactions(row):
+            if row['Change'] > 0:
+                return ['background-color: #e8f5e8'] * len(row)  # Green for additions
+            elif row['Change'] < 0:
+                return ['background-color: #ffeaa7'] * len(row)  # Yellow for reductions
+            return [''] * len(row)
+        
+        st.dataframe(
+            df_display.style.apply(highlight_transactions, axis=1),
+            use_container_width=True
+        )
+    else:
+        st.info("No stock movements match these filters.")
+    
+    col1, col2, col3 = st.columns([1, 1, 2])
+    
+    with col1:
+        if st.button("← Newer", key="ledger_newer", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        if st.button("Older →", key="ledger_older", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+    with col3:
+        st.caption(f"Page {len(cursors)}")
+
+def show_import_export(db):
+    st.subheader("Import Products")
+    st.write("CSV columns: `name`, `description`, `price`, `stock_quantity`, `category`, `sku`")
+    
+    uploaded_file = st.file_uploader("Upload CSV", type=["csv"])
+    
+    if uploaded_file is not None and st.button("Import Products", type="primary"):
+        with st.spinner("Importing products..."):
+            success_count, errors = db.import_products_from_csv_stream(uploaded_file)
+        
+        if success_count:
+            st.success(f"✅ Imported {success_count} products")
+        if errors:
+            st.warning(f"⚠️ {len(errors)} rows were not imported")
+            with st.expander("View Import Errors"):
+                for error in errors[:500]:
+                    st.write(f"• {error}")
+                if len(errors) > 500:
+                    st.write(f"... and {len(errors) - 500} more")
+    
+    st.divider()
+    st.subheader("Export Data")
+    
+    export_type = st.selectbox("Dataset", ["Products", "Orders with Items", "Inventory Ledger"])
+    
+    start_date = end_date = None
+    if export_type != "Products":
+        col1, col2 = st.columns(2)
+        with col1:
+            start_date = st.date_input("From date", value=None, key="export_start_date")
+        with col2:
+            end_date = st.date_input("To date", value=None, key="export_end_date")
+    
+    # Generated on click from a server-side cursor; Streamlit holds the finished file in memory
+    def build_export():
+        if export_type == "Products":
+            chunks = db.stream_products_csv()
+        elif export_type == "Orders with Items":
+            chunks = db.stream_orders_csv(start_date=start_date, end_date=end_date)
+        else:
+            chunks = db.stream_inventory_transactions_csv(start_date=start_date, end_date=end_date)
+        return join_csv_chunks(chunks)
+    
+    file_name = export_type.lower().replace(" ", "_") + ".csv"
+    st.download_button("Download CSV", data=build_export, file_name=file_name, mime="text/csv")
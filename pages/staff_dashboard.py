@@ -1,27 +1,35 @@
 import streamlit as st
 import pandas as pd
+from functools import partial
+from async_database import AsyncDatabaseManager
+from profiling import profile_phase
 
 def show_staff_dashboard_page(db):
     st.title("👥 Staff Dashboard")
     
-    # Get data
-    orders = db.get_all_orders()
-    products = db.get_all_products()
+    # Get data (independent queries run concurrently)
+    data = AsyncDatabaseManager.for_manager(db).fetch_all(
+        status_summary=db.get_order_status_summary,
+        products=db.get_all_products,
+        recent_orders=partial(db.get_orders_with_items, limit=15)
+    )
+    status_summary = data['status_summary']
+    products = data['products']
+    
+    placed_orders = status_summary.get('placed', {}).get('count', 0)
+    paid_orders = status_summary.get('paid', {}).get('count', 0)
     
     # Quick Stats
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        pending_orders = [o for o in orders if o['status'] in ['placed', 'paid']]
-        st.metric("Orders to Process", len(pending_orders))
+        st.metric("Orders to Process", placed_orders + paid_orders)
     
     with col2:
-        placed_orders = [o for o in orders if o['status'] == 'placed']
-        st.metric("Awaiting Payment", len(placed_orders))
+        st.metric("Awaiting Payment", placed_orders)
     
     with col3:
-        paid_orders = [o for o in orders if o['status'] == 'paid']
-        st.metric("Ready to Ship", len(paid_orders))
+        st.metric("Ready to Ship", paid_orders)
     
     with col4:
         low_stock = [p for p in products if p['stock_quantity'] < 10]
@@ -34,10 +42,10 @@ def show_staff_dashboard_page(db):
     
     # Orders needing attention
     if placed_orders:
-        st.warning(f"⚠️ {len(placed_orders)} orders are awaiting payment confirmation")
+        st.warning(f"⚠️ {placed_orders} orders are awaiting payment confirmation")
     
     if paid_orders:
-        st.info(f"📦 {len(paid_orders)} orders are ready for delivery")
+        st.info(f"📦 {paid_orders} orders are ready for delivery")
     
     if low_stock:
         st.error(f"📉 {len(low_stock)} products are running low on stock")
@@ -48,9 +56,9 @@ def show_staff_dashboard_page(db):
     # Recent Activity
     st.subheader("📋 Recent Order Activity")
     
-    if orders:
-        recent_orders = orders[:15]  # Show last 15 orders
-        
+    recent_orders = data['recent_orders']  # Show last 15 orders
+    
+    if recent_orders:
         for order in recent_orders:
             status_color = {
                 'placed': '🟡',
@@ -72,7 +80,7 @@ def show_staff_dashboard_page(db):
                     st.write(f"**Updated:** {order['updated_at']}")
                 
                 # Show items
-                items = db.get_order_items(order['id'])
+                items = order['items']
                 if items:
                     st.write("**Items:**")
                     for item in items:
@@ -97,12 +105,14 @@ def show_staff_dashboard_page(db):
     st.subheader("📦 Inventory Overview")
     
     if products:
-        df_products = pd.DataFrame(products)
+        with profile_phase('dataframe'):
+            df_products = pd.DataFrame(products)
         
         # Show low stock items first
         if low_stock:
             st.write("**🔴 Low Stock Items:**")
-            df_low = pd.DataFrame(low_stock)
+            with profile_phase('dataframe'):
+                df_low = pd.DataFrame(low_stock)
             st.dataframe(
                 df_low[['name', 'stock_quantity', 'price', 'category']],
                 use_container_width=True
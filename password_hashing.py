@@ -0,0 +1,106 @@
+# password_hashing.py
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict
+
+import bcrypt
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing queue is full or a hash misses the timeout; the caller should ask the user to retry"""
+
+
+def hash_rounds(hashed: str) -> int:
+    """Work factor encoded in a bcrypt hash ($2b$<rounds>$...)"""
+    try:
+        return int(hashed.split('$')[2])
+    except (IndexError, ValueError):
+        return 0
+
+
+class PasswordHasher:
+    """bcrypt hashing and verification on a bounded worker pool.
+
+    bcrypt releases the GIL while it works, so worker threads run hashes in
+    parallel without blocking Streamlit script threads. At most max_workers
+    hashes run at once and at most max_queue more wait; beyond that
+    HasherBusy is raised immediately instead of piling up latency.
+    """
+
+    def __init__(self, rounds: int = 12, max_workers: int = None, max_queue: int = 32, timeout: float = 30.0):
+        if not 4 <= rounds <= 31:
+            raise ValueError("bcrypt rounds must be between 4 and 31")
+        self.rounds = rounds
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(self.max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._stats = {'hashes': 0, 'verifications': 0, 'rejected': 0, 'timeouts': 0, 'in_flight': 0}
+
+    @classmethod
+    def from_env(cls) -> 'PasswordHasher':
+        return cls(
+            rounds=int(os.getenv('BCRYPT_ROUNDS', '12')),
+            max_workers=int(os.getenv('AUTH_HASH_WORKERS', '0')) or None,
+            max_queue=int(os.getenv('AUTH_HASH_QUEUE', '32')),
+            timeout=float(os.getenv('AUTH_HASH_TIMEOUT', '30'))
+        )
+
+    def _run(self, func: Callable, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise HasherBusy("Too many logins in progress, please try again")
+
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            # e.g. RuntimeError after shutdown(); no callback will free the slot
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats['in_flight'] += 1
+
+        def release(_future):
+            with self._lock:
+                self._stats['in_flight'] -= 1
+            self._slots.release()
+
+        future.add_done_callback(release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Drop it if still queued; a running hash finishes and frees its slot
+            future.cancel()
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise HasherBusy("Login is taking too long, please try again") from None
+
+    def hash(self, password: str) -> str:
+        hashed = self._run(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(rounds=self.rounds))
+        with self._lock:
+            self._stats['hashes'] += 1
+        return hashed.decode('utf-8')
+
+    def verify(self, password: str, hashed: str) -> bool:
+        result = self._run(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+        with self._lock:
+            self._stats['verifications'] += 1
+        return result
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True when the hash was made with a different work factor than configured"""
+        return hash_rounds(hashed) != self.rounds
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({'rounds': self.rounds, 'max_workers': self.max_workers, 'max_queue': self.max_queue})
+        return stats
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
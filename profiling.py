@@ -0,0 +1,111 @@
+# profiling.py
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+
+# Phases a rerun's wall time is split into. 'render' is whatever is left:
+# page logic and Streamlit widget emission outside the other three.
+PHASES = ('db', 'dataframe', 'charts', 'render')
+
+# Profile of the rerun executing on this thread, if profiling is on
+_current_profile = contextvars.ContextVar('render_profile', default=None)
+
+
+def render_profiling_enabled() -> bool:
+    """Profiling for every session, switched on with RENDER_PROFILING=1"""
+    return os.getenv('RENDER_PROFILING', '0') == '1'
+
+
+class RerunProfile:
+    """Wall-clock breakdown of one Streamlit script run by phase.
+
+    Time is exclusive: a DB call made while building a DataFrame counts
+    towards 'db' only, so the phases always add up to the total.
+    """
+
+    def __init__(self, role: str = None, page: str = None):
+        self.role = role
+        self.page = page
+        self.db_calls = 0
+        self.totals = {phase: 0.0 for phase in PHASES}
+        self.started_at = datetime.now()
+        now = time.perf_counter()
+        self._start = now
+        self._stack = [['render', now]]  # [phase, resumed_at]
+
+    def _switch(self, now: float):
+        """Charge the running phase up to now"""
+        top = self._stack[-1]
+        self.totals[top[0]] += now - top[1]
+        top[1] = now
+
+    @contextmanager
+    def phase(self, name: str):
+        if name not in PHASES:
+            raise ValueError(f"Unknown profiling phase: {name}")
+        if name == 'db':
+            self.db_calls += 1
+        self._switch(time.perf_counter())
+        self._stack.append([name, time.perf_counter()])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._switch(now)
+            self._stack.pop()
+            self._stack[-1][1] = now
+
+    def finish(self) -> Dict:
+        """Close the rerun and return it as a sample row"""
+        now = time.perf_counter()
+        self._switch(now)
+        sample = {
+            'recorded_at': self.started_at,
+            'release': os.getenv('APP_RELEASE', ''),
+            'role': self.role,
+            'page': self.page,
+            'total_ms': (now - self._start) * 1000,
+            'db_calls': self.db_calls,
+        }
+        for phase in PHASES:
+            sample[f'{phase}_ms'] = self.totals[phase] * 1000
+        return sample
+
+
+def current_profile() -> Optional[RerunProfile]:
+    return _current_profile.get()
+
+
+@contextmanager
+def profile_rerun(enabled: bool, role: str = None):
+    """Profile the enclosed script run; yields the RerunProfile, or None when disabled"""
+    if not enabled:
+        yield None
+        return
+    profile = RerunProfile(role=role)
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+@contextmanager
+def profile_phase(name: str):
+    """Charge the enclosed block to a phase of the current rerun (no-op when not profiling)"""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    with profile.phase(name):
+        yield
+
+
+def set_profile_page(page: str):
+    """Label the current rerun with the page being rendered"""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.page = page
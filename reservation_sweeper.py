@@ -0,0 +1,87 @@
+import argparse
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ReservationSweeper:
+    """Background thread that periodically releases expired inventory reservations"""
+
+    def __init__(self, db, interval: float = 60.0, batch_size: int = 500):
+        self.db = db
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last_result: Optional[Dict] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> Dict:
+        """Sweep all currently expired reservations and return the run totals"""
+        result = self.db.release_expired_reservations(batch_size=self.batch_size)
+        self.last_result = result
+        if result['reservations']:
+            logger.info(
+                "Released %d expired reservations (%d units) in %d batches",
+                result['reservations'], result['units'], result['batches']
+            )
+        return result
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name='reservation-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                # Keep sweeping on the next tick, e.g. after a deadlock or lost connection
+                logger.exception("Reservation sweep failed")
+            self._stop.wait(self.interval)
+
+
+def start_sweeper_from_env(db) -> Optional[ReservationSweeper]:
+    """Start an in-process sweeper when RESERVATION_SWEEPER=1"""
+    if os.getenv('RESERVATION_SWEEPER', '0') != '1':
+        return None
+    sweeper = ReservationSweeper(
+        db,
+        interval=float(os.getenv('RESERVATION_SWEEP_INTERVAL', '60')),
+        batch_size=int(os.getenv('RESERVATION_SWEEP_BATCH_SIZE', '500'))
+    )
+    sweeper.start()
+    return sweeper
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Release expired inventory reservations")
+    parser.add_argument('--once', action='store_true', help="run a single sweep and exit")
+    parser.add_argument('--interval', type=float, default=60.0, help="seconds between sweeps")
+    parser.add_argument('--batch-size', type=int, default=500, help="reservations released per transaction")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    from database import DatabaseManager
+    db = DatabaseManager()
+    sweeper = ReservationSweeper(db, interval=args.interval, batch_size=args.batch_size)
+
+    if args.once:
+        result = sweeper.run_once()
+        print(f"Released {result['reservations']} reservations, reclaimed {result['units']} units")
+        return
+
+    sweeper.run_forever()
+
+
+if __name__ == '__main__':
+    main()
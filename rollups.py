@@ -0,0 +1,122 @@
+# rollups.py
+import argparse
+from typing import List
+
+# Daily sales rollups, kept in step with orders by DatabaseManager:
+#   daily_order_rollup    one row per (day, status): order count and revenue
+#   daily_product_rollup  one row per (day, product, status): orders, units and
+#                         revenue, with the product category denormalized
+# The day is the order's creation date; a status change moves the order's
+# contribution from the old status bucket to the new one.
+
+ROLLUP_TABLES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS daily_order_rollup (
+        sales_date DATE NOT NULL,
+        status VARCHAR(50) NOT NULL,
+        order_count INTEGER NOT NULL DEFAULT 0,
+        revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (sales_date, status)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS daily_product_rollup (
+        sales_date DATE NOT NULL,
+        product_id INTEGER NOT NULL,
+        status VARCHAR(50) NOT NULL,
+        category VARCHAR(100),
+        order_count INTEGER NOT NULL DEFAULT 0,
+        units INTEGER NOT NULL DEFAULT 0,
+        revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (sales_date, product_id, status)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_daily_product_rollup_category ON daily_product_rollup (category, sales_date)",
+]
+
+_ORDER_ROLLUP_SELECT = """
+    SELECT created_at::date, status, {sign} * COUNT(*), {sign} * COALESCE(SUM(total_amount), 0)
+    FROM orders
+    {where}
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+"""
+
+_PRODUCT_ROLLUP_SELECT = """
+    SELECT o.created_at::date, oi.product_id, o.status, p.category,
+        {sign} * COUNT(DISTINCT o.id), {sign} * SUM(oi.quantity), {sign} * SUM(oi.quantity * oi.unit_price)
+    FROM orders o
+    JOIN order_items oi ON oi.order_id = o.id
+    JOIN products p ON p.id = oi.product_id
+    {where}
+    GROUP BY 1, 2, 3, 4
+    ORDER BY 1, 2, 3
+"""
+
+
+def apply_order_rollups(cursor, order_ids: List[int], sign: int):
+    """Add (sign=1) or remove (sign=-1) the given orders' contribution under their current status.
+
+    Must run in the same transaction as the order change it accounts for, with
+    the orders already locked or freshly inserted. Rows are upserted in key
+    order so concurrent writers don't deadlock on the rollup tables.
+    """
+    if not order_ids:
+        return
+    if sign not in (1, -1):
+        raise ValueError("sign must be 1 or -1")
+
+    cursor.execute(f"""
+        INSERT INTO daily_order_rollup (sales_date, status, order_count, revenue)
+        {_ORDER_ROLLUP_SELECT.format(sign=sign, where="WHERE id = ANY(%s)")}
+        ON CONFLICT (sales_date, status) DO UPDATE SET
+            order_count = daily_order_rollup.order_count + EXCLUDED.order_count,
+            revenue = daily_order_rollup.revenue + EXCLUDED.revenue
+    """, (list(order_ids),))
+    cursor.execute(f"""
+        INSERT INTO daily_product_rollup (sales_date, product_id, status, category, order_count, units, revenue)
+        {_PRODUCT_ROLLUP_SELECT.format(sign=sign, where="WHERE o.id = ANY(%s)")}
+        ON CONFLICT (sales_date, product_id, status) DO UPDATE SET
+            category = EXCLUDED.category,
+            order_count = daily_product_rollup.order_count + EXCLUDED.order_count,
+            units = daily_product_rollup.units + EXCLUDED.units,
+            revenue = daily_product_rollup.revenue + EXCLUDED.revenue
+    """, (list(order_ids),))
+
+
+def rebuild_rollups(cursor):
+    """Recompute both rollup tables from orders and order_items.
+
+    Incremental writers block on the table lock until the rebuild commits and
+    then apply their deltas on top, so nothing is lost or counted twice.
+    """
+    cursor.execute("LOCK TABLE daily_order_rollup, daily_product_rollup IN EXCLUSIVE MODE")
+    cursor.execute("DELETE FROM daily_order_rollup")
+    cursor.execute("DELETE FROM daily_product_rollup")
+    cursor.execute(f"""
+        INSERT INTO daily_order_rollup (sales_date, status, order_count, revenue)
+        {_ORDER_ROLLUP_SELECT.format(sign=1, where="")}
+    """)
+    cursor.execute(f"""
+        INSERT INTO daily_product_rollup (sales_date, product_id, status, category, order_count, units, revenue)
+        {_PRODUCT_ROLLUP_SELECT.format(sign=1, where="")}
+    """)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the daily sales rollup tables")
+    parser.add_argument('--rebuild', action='store_true', help="recompute the rollups from all orders")
+    args = parser.parse_args()
+
+    if not args.rebuild:
+        parser.print_help()
+        return
+
+    from database import DatabaseManager
+    db = DatabaseManager()
+    db.rebuild_sales_rollups()
+    print("Sales rollups rebuilt")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import math
+import unittest
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import batch_metrics
+import utils
+from benchmarks.utils_metrics import make_orders, make_products
+
+START, END = date(2024, 3, 1), date(2024, 6, 30)
+
+
+class BatchMetricsEquivalenceTest(unittest.TestCase):
+    def setUp(self):
+        self.orders = make_orders(2000, seed=7)
+        self.products = make_products(500, seed=7)
+        self.orders_df = batch_metrics.orders_frame(self.orders)
+        self.products_df = batch_metrics.products_frame(self.products)
+
+    def assertSameNumbers(self, row_result, batch_result):
+        self.assertEqual(row_result.keys(), batch_result.keys())
+        for key in row_result:
+            self.assertTrue(math.isclose(float(row_result[key]), float(batch_result[key]), rel_tol=1e-9), key)
+
+    def test_order_metrics(self):
+        self.assertSameNumbers(utils.calculate_order_metrics(self.orders),
+                               batch_metrics.calculate_order_metrics(self.orders_df))
+
+    def test_status_counts(self):
+        self.assertEqual(utils.get_order_status_counts(self.orders),
+                         batch_metrics.get_order_status_counts(self.orders_df))
+
+    def test_date_range(self):
+        expected = utils.filter_orders_by_date_range(self.orders, START, END)
+        result = batch_metrics.filter_orders_by_date_range(self.orders_df, START, END)
+        self.assertEqual([o['id'] for o in expected], result['id'].tolist())
+
+    def test_date_range_mixed_offsets_and_bad_values(self):
+        orders = [
+            {'id': 1, 'status': 'paid', 'total_amount': 1, 'created_at': '2024-03-01T00:30:00+05:00'},
+            {'id': 2, 'status': 'paid', 'total_amount': 1, 'created_at': '2024-02-29T23:30:00-02:00'},
+            {'id': 3, 'status': 'paid', 'total_amount': 1, 'created_at': 'not a date'},
+            {'id': 4, 'status': 'paid', 'total_amount': 1, 'created_at': '2024-06-30T23:59:59'},
+        ]
+        expected = utils.filter_orders_by_date_range(orders, START, END)
+        result = batch_metrics.filter_orders_by_date_range(orders, START, END)
+        self.assertEqual([o['id'] for o in expected], result['id'].tolist())
+
+    def test_low_stock(self):
+        for threshold in (0, 10, 500):
+            expected = utils.check_low_stock(self.products, threshold)
+            result = batch_metrics.check_low_stock(self.products_df, threshold)
+            self.assertEqual([p['id'] for p in expected], result['id'].tolist())
+
+    def test_inventory_value(self):
+        self.assertTrue(math.isclose(float(utils.calculate_inventory_value(self.products)),
+                                     batch_metrics.calculate_inventory_value(self.products_df), rel_tol=1e-9))
+
+    def test_dict_of_arrays_input(self):
+        columns = {name: np.asarray(self.orders_df[name]) for name in ('status', 'total_amount')}
+        self.assertSameNumbers(utils.calculate_order_metrics(self.orders),
+                               batch_metrics.calculate_order_metrics(columns))
+        self.assertEqual(utils.get_order_status_counts(self.orders),
+                         batch_metrics.get_order_status_counts(columns))
+
+    def test_unknown_status_ignored(self):
+        orders = self.orders[:10] + [{'id': 0, 'status': 'lost', 'total_amount': 5, 'created_at': '2024-01-01'}]
+        # A plain frame, since orders_frame() would already drop the unknown category
+        self.assertEqual(utils.get_order_status_counts(orders), batch_metrics.get_order_status_counts(pd.DataFrame(orders)))
+
+
+class BatchMetricsEmptyInputTest(unittest.TestCase):
+    def test_empty_inputs_match_utils(self):
+        for orders in ([], batch_metrics.orders_frame([]), {}, {'status': np.array([]), 'total_amount': np.array([])}):
+            self.assertEqual(batch_metrics.calculate_order_metrics(orders), utils.calculate_order_metrics([]))
+            self.assertEqual(batch_metrics.get_order_status_counts(orders), utils.get_order_status_counts([]))
+        for products in ([], batch_metrics.products_frame([]), {}):
+            self.assertEqual(batch_metrics.calculate_inventory_value(products), utils.calculate_inventory_value([]))
+
+    def test_empty_frames_keep_columns(self):
+        self.assertIn('created_at', batch_metrics.filter_orders_by_date_range([], START, END).columns)
+        self.assertIn('stock_quantity', batch_metrics.check_low_stock([]).columns)
+        self.assertEqual(len(batch_metrics.check_low_stock(batch_metrics.products_frame([]))), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
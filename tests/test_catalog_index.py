@@ -0,0 +1,110 @@
+import random
+import unittest
+
+from catalog_index import INDEX_SORT_KEYS, CatalogIndex
+
+SORT_KEYS = {
+    'name': lambda p: (p['name'], p['id']),
+    'price_asc': lambda p: (float(p['price']), p['name'], p['id']),
+    'price_desc': lambda p: (-float(p['price']), p['name'], p['id']),
+    'stock': lambda p: (-p['stock_quantity'], p['name'], p['id']),
+}
+
+
+def make_products(n, rng):
+    # Few distinct names, prices and stock levels so ties are common
+    return [
+        {
+            'id': i,
+            'name': f"Product {rng.randrange(n // 3 + 1)}",
+            'price': rng.randrange(1, 20) * 2.5,
+            'stock_quantity': rng.randrange(0, 15),
+            'category': rng.choice(['Toys', 'Books', 'Garden', None]),
+        }
+        for i in rng.sample(range(1, n * 10), n)
+    ]
+
+
+def change_some(products, count, rng):
+    changed = [dict(p) for p in products]
+    for p in rng.sample(changed, count):
+        if rng.random() < 0.5:
+            p['price'] = rng.randrange(1, 20) * 2.5
+        else:
+            p['stock_quantity'] = rng.randrange(0, 15)
+    return changed
+
+
+def ids(rows):
+    return [p['id'] for p in rows]
+
+
+class CatalogIndexTest(unittest.TestCase):
+    def assertMatchesReference(self, index, products):
+        for sort in INDEX_SORT_KEYS:
+            for category in (None, 'Toys', 'Books', 'Garden', 'Missing'):
+                expected = sorted(
+                    (p for p in products if category is None or p['category'] == category), key=SORT_KEYS[sort]
+                )
+                total, rows = index.select(category, sort)
+                self.assertEqual(total, len(expected), (category, sort))
+                self.assertEqual(ids(rows), ids(expected), (category, sort))
+
+    def test_fresh_build_matches_python_sorts(self):
+        rng = random.Random(1)
+        products = make_products(300, rng)
+        self.assertMatchesReference(CatalogIndex.build(products), products)
+
+    def test_incremental_repair_matches_fresh_build(self):
+        rng = random.Random(2)
+        products = make_products(400, rng)
+        index = CatalogIndex.build(products)
+        # Few changes take the repair path, many the full re-sort
+        for count in (1, 3, 10, 25, 200):
+            products = change_some(products, count, rng)
+            previous, index = index, CatalogIndex.build(products, previous=index)
+            self.assertIs(index.orders['name'], previous.orders['name'])
+            fresh = CatalogIndex.build(products)
+            for sort in INDEX_SORT_KEYS:
+                self.assertEqual(index.orders[sort].tolist(), fresh.orders[sort].tolist(), (count, sort))
+            self.assertMatchesReference(index, products)
+
+    def test_unchanged_columns_reuse_permutations(self):
+        rng = random.Random(3)
+        products = make_products(50, rng)
+        index = CatalogIndex.build(products)
+        rebuilt = CatalogIndex.build([dict(p) for p in products], previous=index)
+        for sort in INDEX_SORT_KEYS:
+            self.assertIs(rebuilt.orders[sort], index.orders[sort])
+
+    def test_added_or_renamed_products_rebuild_from_scratch(self):
+        rng = random.Random(4)
+        products = make_products(100, rng)
+        index = CatalogIndex.build(products)
+
+        renamed = [dict(p) for p in products]
+        renamed[0]['name'] = 'Aardvark plush'
+        self.assertMatchesReference(CatalogIndex.build(renamed, previous=index), renamed)
+
+        added = products + [{'id': 0, 'name': 'Zebra kite', 'price': 9.5, 'stock_quantity': 3, 'category': 'Toys'}]
+        self.assertMatchesReference(CatalogIndex.build(added, previous=index), added)
+
+    def test_selection_pages(self):
+        rng = random.Random(5)
+        products = make_products(60, rng)
+        index = CatalogIndex.build(products)
+        selection = index.selection('Toys', 'price_desc')
+        _, everything = index.select('Toys', 'price_desc')
+        self.assertEqual(len(selection), len(everything))
+        self.assertEqual(ids(selection.page(5, 5)), ids(everything[5:10]))
+        self.assertEqual(selection.page(10, len(selection)), [])
+        self.assertEqual(len(index.selection('Missing')), 0)
+
+    def test_unknown_sort_rejected(self):
+        index = CatalogIndex.build([])
+        with self.assertRaises(ValueError):
+            index.selection(None, 'relevance')
+
+
+if __name__ == '__main__':
+    unittest.main()
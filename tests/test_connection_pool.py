@@ -0,0 +1,199 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import psycopg2
+import psycopg2.extensions
+
+from connection_pool import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, vars=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Just enough of a psycopg2 connection for ConnectionPool"""
+
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.rollbacks = 0
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.opened = []
+        patcher = mock.patch('connection_pool.psycopg2.connect', side_effect=self.connect)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def connect(self, dsn):
+        conn = FakeConnection()
+        self.opened.append(conn)
+        return conn
+
+    def make_pool(self, **kwargs):
+        kwargs.setdefault('min_size', 0)
+        kwargs.setdefault('max_size', 2)
+        kwargs.setdefault('timeout', 1.0)
+        pool = ConnectionPool('dbname=test', **kwargs)
+        self.addCleanup(pool.closeall)
+        return pool
+
+    def test_min_size_connections_opened_up_front(self):
+        pool = self.make_pool(min_size=2, max_size=4)
+        stats = pool.stats()
+        self.assertEqual(len(self.opened), 2)
+        self.assertEqual((stats['size'], stats['idle'], stats['in_use']), (2, 2, 0))
+
+    def test_invalid_sizes_rejected(self):
+        for min_size, max_size in ((-1, 2), (0, 0), (3, 2)):
+            with self.assertRaises(ValueError):
+                ConnectionPool('dbname=test', min_size=min_size, max_size=max_size)
+
+    def test_connection_returned_when_caller_raises(self):
+        pool = self.make_pool()
+        with self.assertRaises(ValueError):
+            with pool.connection() as conn:
+                raw = conn.raw_connection
+                raise ValueError("boom")
+        stats = pool.stats()
+        self.assertEqual((stats['in_use'], stats['idle']), (0, 1))
+        with pool.connection() as conn:
+            self.assertIs(conn.raw_connection, raw)
+
+    def test_returned_proxy_is_unusable(self):
+        pool = self.make_pool()
+        with pool.connection() as conn:
+            pass
+        with self.assertRaises(psycopg2.InterfaceError):
+            conn.cursor()
+
+    def test_open_transaction_rolled_back_on_return(self):
+        pool = self.make_pool()
+        with pool.connection() as conn:
+            raw = conn.raw_connection
+            raw.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        self.assertEqual(raw.rollbacks, 1)
+        self.assertEqual(pool.stats()['idle'], 1)
+
+    def test_connection_in_unknown_state_discarded(self):
+        pool = self.make_pool()
+        with pool.connection() as conn:
+            raw = conn.raw_connection
+            raw.status = psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+        stats = pool.stats()
+        self.assertTrue(raw.closed)
+        self.assertEqual((stats['size'], stats['idle'], stats['connections_discarded']), (0, 0, 1))
+
+    def test_exhausted_pool_times_out(self):
+        pool = self.make_pool(max_size=1, timeout=0.05)
+        held = pool.getconn()
+        start = time.monotonic()
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        stats = pool.stats()
+        self.assertEqual((stats['waits'], stats['timeouts'], stats['size']), (1, 1, 1))
+        held.close()
+
+    def test_waiter_gets_connection_returned_meanwhile(self):
+        pool = self.make_pool(max_size=1, timeout=2.0)
+        held = pool.getconn()
+        threading.Timer(0.05, held.close).start()
+        with pool.connection() as conn:
+            self.assertIs(conn.raw_connection, self.opened[0])
+        stats = pool.stats()
+        self.assertEqual((stats['waits'], stats['timeouts'], stats['connections_created']), (1, 0, 1))
+        self.assertGreater(stats['wait_time_max'], 0)
+
+    def test_never_grows_past_max_size(self):
+        pool = self.make_pool(max_size=3, timeout=2.0)
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(20):
+                    with pool.connection():
+                        time.sleep(0.001)
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = pool.stats()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(self.opened), 3)
+        self.assertEqual(stats['max_in_use'], 3)
+        self.assertEqual((stats['checkouts'], stats['in_use']), (160, 0))
+
+    def test_broken_idle_connection_replaced_on_checkout(self):
+        pool = self.make_pool(min_size=1, health_check_interval=0)
+        self.opened[0].broken = True
+        with pool.connection() as conn:
+            self.assertIs(conn.raw_connection, self.opened[1])
+        stats = pool.stats()
+        self.assertTrue(self.opened[0].closed)
+        self.assertEqual((stats['health_check_failures'], stats['connections_discarded']), (1, 1))
+
+    def test_recently_used_connection_skips_health_check(self):
+        pool = self.make_pool(min_size=1, health_check_interval=60)
+        self.opened[0].broken = True
+        with pool.connection() as conn:
+            self.assertIs(conn.raw_connection, self.opened[0])
+        self.assertEqual(pool.stats()['health_check_failures'], 0)
+
+    def test_connect_retried_with_backoff(self):
+        failures = [psycopg2.OperationalError("starting up")] * 2
+        connect = self.connect
+
+        def flaky(dsn):
+            if failures:
+                raise failures.pop()
+            return connect(dsn)
+
+        with mock.patch('connection_pool.psycopg2.connect', side_effect=flaky):
+            pool = self.make_pool(retry_delay=0)
+            with pool.connection():
+                pass
+        stats = pool.stats()
+        self.assertEqual((stats['connect_failures'], stats['connections_created']), (2, 1))
+
+    def test_closed_pool_refuses_checkout(self):
+        pool = self.make_pool(min_size=1)
+        pool.closeall()
+        self.assertTrue(self.opened[0].closed)
+        with self.assertRaises(psycopg2.InterfaceError):
+            pool.getconn()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import time
+import unittest
+
+from instrumentation import QueryStats, _current_method, instrument_methods
+
+
+@instrument_methods()
+class FakeManager:
+    def __init__(self):
+        self.query_stats = QueryStats(slow_query_ms=0)
+        self.closed = False
+
+    def stream_rows(self, n, fail_at=None):
+        return self._rows(n, fail_at)
+
+    def _rows(self, n, fail_at):
+        try:
+            for i in range(n):
+                if i == fail_at:
+                    raise ValueError("broken row")
+                time.sleep(0.01)
+                self.query_stats.record_statement("FETCH FORWARD 1 FROM export", 0.0, 1)
+                yield i
+        finally:
+            self.closed = True
+
+    def plain(self):
+        self.query_stats.record_statement("SELECT 1", 0.0, 1)
+        return 1
+
+
+class GeneratorMethodTimingTest(unittest.TestCase):
+    def setUp(self):
+        self.db = FakeManager()
+
+    def method(self, name):
+        return self.db.query_stats.methods.get(name)
+
+    def test_iteration_is_timed_and_recorded_once(self):
+        rows = self.db.stream_rows(3)
+        self.assertIsNone(self.method('stream_rows'))
+        self.assertEqual(list(rows), [0, 1, 2])
+        entry = self.method('stream_rows')
+        self.assertEqual(entry['calls'], 1)
+        self.assertGreaterEqual(entry['latency'].sum, 0.03)
+
+    def test_statements_during_iteration_are_attributed_to_the_method(self):
+        list(self.db.stream_rows(2))
+        key = ('stream_rows', 'FETCH FORWARD 1 FROM export')
+        self.assertEqual(self.db.query_stats.statements[key]['calls'], 2)
+        self.assertIsNone(_current_method.get())
+
+    def test_abandoned_generator_is_closed_and_recorded(self):
+        rows = self.db.stream_rows(5)
+        next(rows)
+        rows.close()
+        self.assertTrue(self.db.closed)
+        self.assertEqual(self.method('stream_rows')['calls'], 1)
+
+    def test_failure_during_iteration_counts_as_error(self):
+        with self.assertRaises(ValueError):
+            list(self.db.stream_rows(3, fail_at=1))
+        self.assertEqual(self.method('stream_rows')['errors'], 1)
+
+    def test_plain_methods_unchanged(self):
+        self.assertEqual(self.db.plain(), 1)
+        self.assertEqual(self.method('plain')['calls'], 1)
+        self.assertIn(('plain', 'SELECT 1'), self.db.query_stats.statements)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+import bcrypt
+
+from password_hashing import HasherBusy, PasswordHasher
+
+
+class PasswordHasherTimeoutTest(unittest.TestCase):
+    def setUp(self):
+        self.hasher = PasswordHasher(rounds=12, max_workers=1, timeout=0.001)
+
+    def tearDown(self):
+        self.hasher.shutdown()
+
+    def test_slow_hash_raises_hasher_busy(self):
+        with self.assertRaises(HasherBusy):
+            self.hasher.hash('correct horse battery staple')
+        self.assertEqual(self.hasher.stats()['timeouts'], 1)
+
+    def test_slow_verify_raises_hasher_busy(self):
+        hashed = bcrypt.hashpw(b'secret', bcrypt.gensalt(rounds=12)).decode('utf-8')
+        with self.assertRaises(HasherBusy):
+            self.hasher.verify('secret', hashed)
+
+
+class PasswordHasherSlotTest(unittest.TestCase):
+    def test_failed_submit_frees_its_slot(self):
+        hasher = PasswordHasher(rounds=4, max_workers=1, max_queue=1)
+        hasher.shutdown()
+        # More attempts than slots: each must fail on submit, not with HasherBusy
+        for _ in range(hasher.max_workers + hasher.max_queue + 1):
+            with self.assertRaises(RuntimeError):
+                hasher.hash('secret')
+        self.assertEqual(hasher.stats()['rejected'], 0)
+        self.assertEqual(hasher.stats()['in_flight'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import streamlit as st
+import math
 from datetime import datetime, timedelta
-import pandas as pd
+from profiling import profile_phase
 
 def format_currency(amount):
     """Format amount as currency"""
@@ -98,9 +99,19 @@ def export_orders_to_csv(orders):
     if not orders:
         return None
     
+    import pandas as pd
+    
     df = pd.DataFrame(orders)
     return df.to_csv(index=False)
 
+def join_csv_chunks(chunks):
+    """Encode streamed CSV chunks into the bytes st.download_button serves.
+    
+    Streamlit keeps the whole download in memory, so this path is not
+    constant-memory; only the DatabaseManager.stream_*_csv generators are.
+    """
+    return b''.join(chunk.encode('utf-8') for chunk in chunks)
+
 def get_order_status_counts(orders):
     """Get count of orders by status"""
     status_counts = {'placed': 0, 'paid': 0, 'delivered': 0, 'cancelled': 0}
@@ -130,13 +141,109 @@ def calculate_inventory_value(products):
     """Calculate total inventory value"""
     return sum(p['stock_quantity'] * p['price'] for p in products)
 
-def get_top_selling_products(orders, limit=10):
-    """Get top selling products from order data"""
-    #product_sales = {}
+def get_top_selling_products(db, limit=10, by='units', days=None, category=None):
+    """Get top selling products (by 'units' or 'revenue') over the last `days` days"""
+    import analytics
+    
+    start_date = datetime.now().date() - timedelta(days=days - 1) if days else None
+    top_products = analytics.get_top_selling_products(db, by=by, limit=limit, start_date=start_date, category=category)
+    return top_products.to_dict('records')
+
+def show_top_selling_products(db, key, limit=10):
+    """Show top sellers with ranking, time window and category controls"""
+    st.subheader("🏆 Top Selling Products")
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        ranking = st.selectbox("Rank by", ["Units Sold", "Revenue"], key=f"{key}_rank_by")
+    
+    with col2:
+        windows = {"Last 7 Days": 7, "Last 30 Days": 30, "Last 90 Days": 90, "All Time": None}
+        window = st.selectbox("Period", list(windows.keys()), index=1, key=f"{key}_period")
+    
+    with col3:
+        category = st.selectbox("Category", ["All"] + db.get_product_categories(), key=f"{key}_category")
+    
+    by = 'units' if ranking == "Units Sold" else 'revenue'
+    top_products = get_top_selling_products(
+        db,
+        limit=limit,
+        by=by,
+        days=windows[window],
+        category=category if category != "All" else None
+    )
+    
+    if top_products:
+        import pandas as pd
+        import plotly.express as px
+        
+        with profile_phase('dataframe'):
+            df_top = pd.DataFrame(top_products)
+        value_column = 'units' if by == 'units' else 'revenue'
+        with profile_phase('charts'):
+            fig = px.bar(df_top, x=value_column, y='name', orientation='h', title=f"Top {limit} Products by {ranking}")
+            fig.update_layout(yaxis={'categoryorder': 'total ascending'})
+            st.plotly_chart(fig, use_container_width=True)
+        
+        with profile_phase('dataframe'):
+            df_display = df_top[['name', 'category', 'units', 'revenue']]
+            df_display.columns = ['Product', 'Category', 'Units Sold', 'Revenue ($)']
+        st.dataframe(df_display, use_container_width=True, hide_index=True)
+    else:
+        st.info("No sales in the selected period.")
+
+def show_bulk_status_action(db, orders, from_status, to_status, action_label, key):
+    """Multi-select of the orders in from_status with one button moving them all to to_status"""
+    result_key = f"{key}_result"
+    if result_key in st.session_state:
+        st.success(st.session_state.pop(result_key))
+    
+    candidates = {order['id']: order for order in orders if order['status'] == from_status}
+    if not candidates:
+        st.caption(f"No {from_status} orders.")
+        return
+    
+    select_all = st.checkbox(f"Select all {len(candidates)} {from_status} orders", key=f"{key}_all")
+    if select_all:
+        selected = list(candidates.keys())
+    else:
+        selected = st.multiselect(
+            f"Orders to {action_label.lower()}",
+            list(candidates.keys()),
+            format_func=lambda order_id: f"#{order_id} - {candidates[order_id]['username']} - ${candidates[order_id]['total_amount']:.2f}",
+            key=f"{key}_selected"
+        )
+    
+    if st.button(f"{action_label} ({len(selected)})", key=f"{key}_apply", type="primary", disabled=not selected):
+        updated = db.update_order_statuses(selected, from_status, to_status)
+        message = f"{len(updated)} order(s) marked as {to_status}."
+        if len(updated) < len(selected):
+            message += f" {len(selected) - len(updated)} skipped (status changed meanwhile)."
+        st.session_state[result_key] = message
+        st.session_state.pop(f"{key}_selected", None)
+        st.rerun()
+
+def show_pagination_controls(total_count, key, page_size_options=(10, 25, 50, 100)):
+    """Show page size and page number controls, return (limit, offset)"""
+    col1, col2, col3 = st.columns([1, 1, 2])
+    
+    with col1:
+        page_size = st.selectbox("Per page", list(page_size_options), key=f"{key}_page_size")
+    
+    total_pages = max(1, math.ceil(total_count / page_size))
+    page_key = f"{key}_page"
+    # Filters may shrink the result set below the page the user was on
+    if st.session_state.get(page_key, 1) > total_pages:
+        st.session_state[page_key] = total_pages
     
-    # This would require joining with order_items table
-    # For now, return empty list as this requires more complex DB queries
-    return []
+    with col2:
+        page = st.number_input("Page", min_value=1, max_value=total_pages, value=1, step=1, key=page_key)
+    
+    with col3:
+        st.caption(f"Page {page} of {total_pages} · {total_count} results")
+    
+    return page_size, (page - 1) * page_size
 
 def show_success_message(message):
     """Show success message with icon"""
@@ -153,3 +260,28 @@ def show_info_message(message):
 def show_warning_message(message):
     """Show warning message with icon"""
     st.warning(f"⚠️ {message}")
+
+def show_render_profile_panel(db, sample=None):
+    """Admin-only sidebar panel: last rerun's phase breakdown and persisted history"""
+    import pandas as pd
+    
+    with st.sidebar.expander("⏱️ Render Profiling"):
+        st.checkbox("Profile reruns in this session", key="render_profiling")
+        
+        if sample:
+            st.caption(f"Last rerun: {sample['page'] or 'unknown page'} - {sample['total_ms']:.0f} ms, {sample['db_calls']} DB calls")
+            df_phases = pd.DataFrame({
+                'Phase': ['DB', 'DataFrame', 'Charts', 'Render'],
+                'ms': [round(sample[f'{phase}_ms'], 1) for phase in ('db', 'dataframe', 'charts', 'render')]
+            })
+            st.dataframe(df_phases, use_container_width=True, hide_index=True)
+        else:
+            st.caption("No profile for this rerun.")
+        
+        if st.button("Show history (7 days)", key="render_profile_history"):
+            summary = db.get_render_profile_summary(days=7)
+            if summary:
+                df_summary = pd.DataFrame(summary)
+                st.dataframe(df_summary.round(1), use_container_width=True, hide_index=True)
+            else:
+                st.info("No samples recorded yet.")